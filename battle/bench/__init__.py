@@ -0,0 +1,4 @@
+"""
+timing scripts for the hot paths. `python -m battle.bench` runs the hot path suite and writes json. the other modules
+run on their own with `python -m battle.bench.<module>`
+"""
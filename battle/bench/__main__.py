@@ -0,0 +1,45 @@
+"""
+`python -m battle.bench` times every case in `battle.bench.hot_paths` for each map size and unit density and writes
+the results as json, so they can be compared from run to run.
+"""
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from typing import List
+
+from battle.bench.hot_paths import CASES, DENSITIES, SIZES, run_cases
+
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(prog='python -m battle.bench', description='time the spatial hot paths')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='width (and height) of each map')
+    parser.add_argument('--densities', type=float, nargs='+', default=list(DENSITIES),
+                        help='share of the tiles with a unit on them')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=None, help='default: all of them')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds that each repeat runs for at least')
+    parser.add_argument('--output', help='file to write to. default: stdout')
+    options = parser.parse_args(args)
+
+    results = []
+    for size in options.sizes:
+        for density in options.densities:
+            results.extend(run_cases(size, density, options.cases, options.repeat, options.min_time))
+
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'results': results,
+    }
+    if options.output:
+        with open(options.output, 'w') as output_file:
+            json.dump(report, output_file, indent=1)
+    else:
+        json.dump(report, sys.stdout, indent=1)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
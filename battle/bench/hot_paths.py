@@ -0,0 +1,146 @@
+"""
+times the spatial hot paths on square generated maps with a share of the tiles taken by units. a unit with a
+ranged weapon is spawned near the middle of the map and everything is measured from where it lands.
+"""
+import random
+from timeit import Timer
+from typing import Callable, Dict, List
+
+from battle.lineofsight import LineOfSight
+from battle.maptools.generator import generate_map
+from battle.maptools.point import Point
+from battle.movementcalculator import MovementCalculator
+from battle.perimiterlistener import PerimeterListener
+from battle.players.team import Team
+from battle.players.units import Soldier
+from battle.rangefinder import RangeFinder
+from battle.turn_execution.target_finder import TargetFinder
+from battle.weapon import RangedWeapon
+
+SIZES = (10, 50, 100, 500)
+DENSITIES = (0.02, 0.1)
+DISTANCE = 5
+MAX_MV = 10
+MAX_ELEVATION = 3
+SPAWN_ALL_UNITS = 50
+
+
+class BenchSetup(object):
+    def __init__(self, size: int, density: float, seed: int = 0):
+        rng = random.Random(seed)
+        self.size = size
+        self.density = density
+        self.map = generate_map(size, size, seed, max_elevation=MAX_ELEVATION, scale=4)
+
+        self.team = Team(Point(size // 2, size // 2), self.map)
+        self.other_team = Team(Point(0, 0), self.map)
+        self.unit = Soldier()
+        self.unit.equip_weapon(RangedWeapon(dmg=5, action_pts=2, range_=DISTANCE, ammo=10))
+        self.team.add_player(self.unit)
+        _, self.origin = self.team.spawn()
+
+        free_points = [point for point in Point(0, 0).to_rectangle(size, size) if self.map.can_place_unit(point)]
+        crowd = rng.sample(free_points, min(len(free_points), int(density * size * size)))
+        for point in crowd:
+            self.map.place_unit(Soldier(), point)
+        self.units = len(crowd) + 1
+
+        self.movement_calculator = MovementCalculator(self.map)
+        self.sighter = LineOfSight(self.map)
+        self.range_finder = RangeFinder(self.map)
+        self.perimeter_listener = PerimeterListener(self.map)
+        self.target_finder = TargetFinder(self.map, [self.team, self.other_team])
+
+
+def _range_finder_case(method_name: str) -> Callable[[BenchSetup], Callable[[], object]]:
+    """sight ranges are cached, so the cache is cleared first to time the work."""
+    def case(setup: BenchSetup):
+        range_finder = setup.range_finder
+        method = getattr(range_finder, method_name)
+
+        def run():
+            range_finder.clear_sight_ranges()
+            return method(setup.origin, DISTANCE)
+        return run
+    return case
+
+
+def _can_sight_ring(setup: BenchSetup):
+    """every point at DISTANCE from origin, so one call checks up to 4 * DISTANCE targets."""
+    targets = [point for point in setup.origin.at_distance(DISTANCE) if setup.map.is_on_map(point)]
+
+    def run():
+        return [setup.sighter.can_sight_target(target, setup.origin) for target in targets]
+    return run
+
+
+def _set_and_rm_perimeter(setup: BenchSetup):
+    def run():
+        setup.perimeter_listener.set_perimeter(setup.unit, setup.origin)
+        setup.perimeter_listener.rm_perimeter(setup.unit)
+    return run
+
+
+def _spawn(setup: BenchSetup):
+    """spawn a unit, then take it off the map and the team again."""
+    def run():
+        unit = Soldier()
+        setup.team.add_player(unit)
+        _, point = setup.team.spawn()
+        setup.map.remove_unit(point)
+        setup.team.unteam_player(unit)
+    return run
+
+
+def _spawn_all(setup: BenchSetup):
+    """spawn SPAWN_ALL_UNITS units at once, then take them off the map and the team again."""
+    def run():
+        units = [Soldier() for _ in range(SPAWN_ALL_UNITS)]
+        for unit in units:
+            setup.team.add_player(unit)
+        for unit, point in setup.team.spawn_all():
+            setup.map.remove_unit(point)
+            setup.team.unteam_player(unit)
+    return run
+
+
+CASES = {
+    'MovementCalculator.get_movement_points':
+        lambda setup: lambda: setup.movement_calculator.get_movement_points(setup.origin, MAX_MV),
+    'MovementCalculator.get_movement_points_with_path':
+        lambda setup: lambda: setup.movement_calculator.get_movement_points_with_path(setup.origin, MAX_MV),
+    'LineOfSight.can_sight_target': _can_sight_ring,
+    'RangeFinder.get_all_usable_points_units_only': _range_finder_case('get_all_usable_points_units_only'),
+    'RangeFinder.get_all_usable_points': _range_finder_case('get_all_usable_points'),
+    'RangeFinder.get_all_units': _range_finder_case('get_all_units'),
+    'RangeFinder.get_sight_ranges': _range_finder_case('get_sight_ranges'),
+    'RangeFinder.get_sight_ranges_units_only': _range_finder_case('get_sight_ranges_units_only'),
+    'RangeFinder.get_attack_ranges_ranged': _range_finder_case('get_attack_ranges_ranged'),
+    'RangeFinder.get_attack_ranges_ranged_units_only': _range_finder_case('get_attack_ranges_ranged_units_only'),
+    'RangeFinder.get_attack_ranges_melee': _range_finder_case('get_attack_ranges_melee'),
+    'RangeFinder.get_attack_ranges_melee_units_only': _range_finder_case('get_attack_ranges_melee_units_only'),
+    'PerimeterListener.set_perimeter/rm_perimeter': _set_and_rm_perimeter,
+    'TargetFinder.units_in_sight': lambda setup: lambda: setup.target_finder.units_in_sight(setup.unit),
+    'TargetFinder.units_in_range': lambda setup: lambda: setup.target_finder.units_in_range(setup.unit),
+    'Team.spawn': _spawn,
+    'Team.spawn_all': _spawn_all,
+}  # type: Dict[str, Callable[[BenchSetup], Callable[[], object]]]
+
+
+def time_call(func: Callable[[], object], repeat: int = 3, min_time: float = 0.2) -> float:
+    """best seconds per call. the number of calls per repeat is picked so that a repeat takes at least min_time."""
+    timer = Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    return min(timer.repeat(repeat, number)) / number
+
+
+def run_cases(size: int, density: float, case_names: List[str] = None, repeat: int = 3,
+              min_time: float = 0.2) -> List[dict]:
+    setup = BenchSetup(size, density)
+    results = []
+    for name in case_names or list(CASES):
+        seconds = time_call(CASES[name](setup), repeat, min_time)
+        results.append({'case': name, 'size': size, 'density': density, 'units': setup.units, 'seconds': seconds})
+    return results
@@ -0,0 +1,43 @@
+"""compares `Map.is_on_map` and `Map.contains_xy` with the old scan over a list of every point on the map."""
+from timeit import timeit
+
+from battle.maptools.map import Map
+from battle.maptools.point import Point
+
+SIZES = (100, 500)
+
+
+def time_is_on_map(size: int, number: int = 1000) -> dict:
+    map_ = Map(size, size, [])
+    all_points = Point(0, 0).to_rectangle(size, size)
+    on_map = Point(size - 1, size - 1)
+    off_map = Point(size, size)
+
+    def list_scan():
+        return on_map in all_points, off_map in all_points
+
+    def is_on_map():
+        return map_.is_on_map(on_map), map_.is_on_map(off_map)
+
+    def contains_xy():
+        return map_.contains_xy(size - 1, size - 1), map_.contains_xy(size, size)
+
+    scan_number = max(1, number // size)
+    return {
+        'size': size,
+        'list_scan': timeit(list_scan, number=scan_number) / scan_number,
+        'is_on_map': timeit(is_on_map, number=number) / number,
+        'contains_xy': timeit(contains_xy, number=number) / number,
+    }
+
+
+def main():
+    for size in SIZES:
+        result = time_is_on_map(size)
+        print('{size}x{size}: list scan {list_scan:.3e}s  is_on_map {is_on_map:.3e}s  '
+              'contains_xy {contains_xy:.3e}s  speedup x{speedup:.0f}'.format(
+                  speedup=result['list_scan'] / result['is_on_map'], **result))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,149 @@
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from math import floor, ceil
-from battle.maptools.point import Point
-from battle.maptools.map import Map
+from typing import Dict, List, Set, Tuple, Union
+
+from battle.maptools.point import Point, get_ring_offsets
+from battle.maptools.map import Map, MapEvent
 
 
 class LineOfSight(object):
     def __init__(self, map_: Map):
         self.map = map_
+        self._visible = {}  # type: Dict[Point, Set[Point]]
+        self._table_radius = -1
+        self.map.subscribe(self._on_map_change)
+
+    def precompute(self, max_radius: int, processes: int = None):
+        """
+        work out `can_sight_target` for every shooter with a tile and every target on the map within max_radius.
+        afterwards, `can_sight_target` for those pairs is a table lookup. when a tile changes, only the shooters
+        close enough to see past it are dropped from the table.
+
+        :param processes: if given, split the work across a pool of this many processes.
+        """
+        width, height = self.map.get_size()
+        shooters = [point for point in Point(0, 0).to_rectangle(width, height) if self.map.has_tile(point)]
+        if processes:
+            chunks = [shooters[start::processes] for start in range(processes)]
+            with ProcessPoolExecutor(processes, initializer=_set_worker_sighter, initargs=(self.map,)) as executor:
+                results = executor.map(_get_worker_visible_targets, chunks, [max_radius] * processes)
+                visible = {shooter: targets for result in results for shooter, targets in result}
+        else:
+            visible = {shooter: self.get_visible_targets(shooter, max_radius) for shooter in shooters}
+
+        self._visible = visible
+        self._table_radius = max_radius
+
+    def clear_table(self):
+        self._visible = {}
+        self._table_radius = -1
+
+    def get_table_radius(self) -> int:
+        """-1 if there is no table"""
+        return self._table_radius
+
+    def is_in_table(self, shooter: Point) -> bool:
+        return shooter in self._visible
+
+    def __setstate__(self, state):
+        """a map leaves its subscribers behind when it is copied, so subscribe again to the copy."""
+        self.__dict__.update(state)
+        self.map.subscribe(self._on_map_change)
+
+    def _on_map_change(self, event: MapEvent, point: Point, _):
+        """a line through point can only belong to a shooter within the table radius of it"""
+        if event is not MapEvent.TILE_CHANGED or not self._visible:
+            return None
+        x = point.x
+        y = point.y
+        for distance in range(self._table_radius + 1):
+            for del_x, del_y in get_ring_offsets(distance):
+                self._visible.pop(Point(x + del_x, y + del_y), None)
+
+    def get_visible_targets(self, shooter: Point, max_radius: int) -> Set[Point]:
+        """every point on the map within max_radius that shooter can sight"""
+        point_cache = self.map.get_point_cache()
+        x = shooter.x
+        y = shooter.y
+        visible = set()
+        for distance in range(max_radius + 1):
+            for del_x, del_y in get_ring_offsets(distance):
+                if self.map.contains_xy(x + del_x, y + del_y):
+                    target = point_cache.get(x + del_x, y + del_y)
+                    if self._calculate_can_sight_target(target, shooter):
+                        visible.add(target)
+        return visible
+
+    def get_sighted_targets(self, shooter: Point, targets: List[Point]) -> List[Point]:
+        """
+        same answer as `can_sight_target` for each target, in one sweep from the shooter.
+
+        only points higher than the shooter can block a line from it, so those are collected once. each target is
+        then checked against the ones higher than both ends instead of walking the line. if there are a lot more
+        of those than steps in the line, it walks the line.
+        """
+        if not targets:
+            return []
+        max_distance = max(abs(target.x - shooter.x) + abs(target.y - shooter.y) for target in targets)
+        obstacles, negative_elevations = self._get_obstacles(shooter, max_distance)
+        shooter_elevation = self.map.get_elevation(shooter)
+
+        sighted = []
+        for target in targets:
+            from_table = self._look_up(target, shooter)
+            if from_table is not None:
+                if from_table:
+                    sighted.append(target)
+                continue
+
+            target_elevation = self.map.get_elevation(target)
+            if target_elevation < shooter_elevation:
+                start, finish = shooter, target
+            else:
+                start, finish = target, shooter
+            blockers = bisect_left(negative_elevations, -self.map.get_elevation(start))
+            line_length = max(abs(target.x - shooter.x), abs(target.y - shooter.y))
+            if blockers > 4 * line_length:
+                is_blocked = self.is_obstacle_higher_than_start(start, finish)
+            else:
+                is_blocked = is_any_on_sight_line(obstacles[:blockers], start, finish)
+            if not is_blocked:
+                sighted.append(target)
+        return sighted
+
+    def _get_obstacles(self, shooter: Point, max_distance: int) -> Tuple[List[Point], List[float]]:
+        """points within max_distance higher than the shooter, highest first, and their negated elevations"""
+        shooter_elevation = self.map.get_elevation(shooter)
+        point_cache = self.map.get_point_cache()
+        x = shooter.x
+        y = shooter.y
+        found = []
+        for distance in range(1, max_distance + 1):
+            for del_x, del_y in get_ring_offsets(distance):
+                if self.map.contains_xy(x + del_x, y + del_y):
+                    point = point_cache.get(x + del_x, y + del_y)
+                    elevation = self.map.get_elevation(point)
+                    if elevation > shooter_elevation:
+                        found.append((-elevation, point))
+        found.sort(key=lambda pair: pair[0])
+        return [pair[1] for pair in found], [pair[0] for pair in found]
 
     def can_sight_target(self, target: Point, shooter: Point) -> bool:
+        from_table = self._look_up(target, shooter)
+        if from_table is not None:
+            return from_table
+        return self._calculate_can_sight_target(target, shooter)
+
+    def _look_up(self, target: Point, shooter: Point) -> Union[bool, None]:
+        visible = self._visible.get(shooter)
+        if visible is None or not self.map.is_on_map(target):
+            return None
+        if abs(target.x - shooter.x) + abs(target.y - shooter.y) > self._table_radius:
+            return None
+        return target in visible
+
+    def _calculate_can_sight_target(self, target: Point, shooter: Point) -> bool:
         if self.is_target_below_shooter(target, shooter):
             return not self.is_obstacle_higher_than_start(shooter, target)
         else:
@@ -52,6 +188,28 @@ class LineOfSight(object):
         return False
 
 
+def is_any_on_sight_line(points: List[Point], start: Point, finish: Point) -> bool:
+    """true if `is_obstacle_higher_than_start(start, finish)` looks at any of the points"""
+    slope = get_slope(start, finish)
+    if -1 < slope < 1:
+        deltas = get_deltas_between(start.x, finish.x)
+        for point in points:
+            delta_x = point.x - start.x
+            if delta_x in deltas:
+                delta_y = point.y - start.y
+                if delta_y == floor(slope * delta_x) or delta_y == ceil(slope * delta_x):
+                    return True
+    else:
+        deltas = get_deltas_between(start.y, finish.y)
+        for point in points:
+            delta_y = point.y - start.y
+            if delta_y in deltas:
+                delta_x = point.x - start.x
+                if delta_x == floor(delta_y / slope) or delta_x == ceil(delta_y / slope):
+                    return True
+    return False
+
+
 def get_slope(start: Point, finish: Point) -> float:
     del_x = finish.x - start.x
     del_y = finish.y - start.y
@@ -66,3 +224,15 @@ def get_deltas_between(a, b):
         return range(1, change)
     else:
         return range(-1, change, -1)
+
+
+_worker_sighter = None  # type: LineOfSight
+
+
+def _set_worker_sighter(map_: Map):
+    global _worker_sighter
+    _worker_sighter = LineOfSight(map_)
+
+
+def _get_worker_visible_targets(shooters: List[Point], max_radius: int) -> List[Tuple[Point, Set[Point]]]:
+    return [(shooter, _worker_sighter.get_visible_targets(shooter, max_radius)) for shooter in shooters]
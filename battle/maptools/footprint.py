@@ -1,8 +1,7 @@
-from collections import deque, namedtuple
-from typing import Dict
+from typing import Dict, List, Tuple
 from enum import Enum
 from battle.maptools.direction import Direction
-from battle.maptools.vector import Vector, DangerOpportunity
+from battle.maptools.vector import Vector, DangerOpportunity, DangerOpportunitySum
 
 
 class Token(Enum):
@@ -44,27 +43,71 @@ class FootPrint(object):
         return self._team
 
     def vectorize(self) -> DangerOpportunity:
-        danger = Vector.from_dir_and_mag(self.direction, self.token.danger)
-        opportunity = Vector.from_dir_and_mag(self.direction, self.token.opportunity)
-        return DangerOpportunity(danger=danger, opportunity=opportunity)
+        """one shared DangerOpportunity for each token and direction. they are immutable, so nothing is made here."""
+        return _VECTORS[self._token, self._direction]
 
 
 class FootPrintPackage(object):
+    """
+    the last max_size footprints in a ring buffer. the danger and opportunity of each team's footprints are summed in
+    place as they are pushed and pushed out, so `team_vectors` does not look at the footprints.
+    """
     def __init__(self, max_size=10):
-        self._stack = deque([], maxlen=max_size)
+        self._ring = [None] * max_size  # type: List[FootPrint]
+        self._next = 0
+        self._count = 0
+        self._team_counts = {}  # type: Dict['Team', int]
+        self._team_sums = {}  # type: Dict['Team', DangerOpportunitySum]
+
+    @property
+    def max_size(self):
+        return len(self._ring)
 
     def push(self, footprint: FootPrint):
-        self._stack.appendleft(footprint)
+        if not self._ring:
+            return None
+        oldest = self._ring[self._next]
+        if oldest is not None:
+            self._take_from_sums(oldest)
+        else:
+            self._count += 1
+        self._ring[self._next] = footprint
+        self._next = (self._next + 1) % len(self._ring)
+        self._add_to_sums(footprint)
+
+    def _add_to_sums(self, footprint: FootPrint):
+        team = footprint.team
+        sums = self._team_sums.get(team)
+        if sums is None:
+            sums = self._team_sums[team] = DangerOpportunitySum()
+            self._team_counts[team] = 0
+        self._team_counts[team] += 1
+        sums.add(footprint.vectorize())
+
+    def _take_from_sums(self, footprint: FootPrint):
+        team = footprint.team
+        self._team_counts[team] -= 1
+        if not self._team_counts[team]:
+            del self._team_counts[team]
+            del self._team_sums[team]
+        else:
+            self._team_sums[team].subtract(footprint.vectorize())
 
     @property
     def footprints(self):
-        return list(self._stack)
+        """newest first"""
+        if not self._count:
+            return []
+        size = len(self._ring)
+        return [self._ring[(self._next - offset) % size] for offset in range(1, self._count + 1)]
 
     def team_vectors(self):
         answer = {}  # type: Dict['Team', DangerOpportunity]
-        for footprint in self._stack:
-            team = footprint.team
-            current = answer.get(footprint.team, DangerOpportunity.empty())
-            answer[team] = current.add(footprint.vectorize())
-
+        for team, sums in self._team_sums.items():
+            answer[team] = sums.to_danger_opportunity()
         return answer
+
+
+_VECTORS = {(token, direction): DangerOpportunity(Vector.from_dir_and_mag(direction, token.danger),
+                                                  Vector.from_dir_and_mag(direction, token.opportunity))
+            for token in Token for direction in Direction}  # type: Dict[Tuple[Token, Direction], DangerOpportunity]
@@ -0,0 +1,100 @@
+"""
+seeded maps for tests, benchmarks and simulations, written straight into the buffers of `Map.from_buffers` without
+making a Tile per point. the same arguments always give the same map.
+"""
+import random
+from array import array
+from typing import List
+
+from battle.maptools.map import Map
+
+
+def generate_map(width: int, height: int, seed: int = 0, max_elevation: int = 5, scale: int = 16,
+                 impassable_clusters: int = 0, cluster_size: int = 20, terrain_regions: int = 0,
+                 max_terrain_mv: int = 3) -> Map:
+    """
+    :param scale: distance between the random values of the height noise. bigger is smoother.
+    :param impassable_clusters: blobs of about cluster_size ImpassableTiles.
+    :param terrain_regions: rectangles of terrain_mv from 2 to max_terrain_mv. everywhere else is 1.
+    """
+    rng = random.Random(seed)
+    elevations = get_elevations(width, height, rng, max_elevation, scale)
+    terrain_mvs = get_terrain_mvs(width, height, rng, terrain_regions, max_terrain_mv)
+    impassable = get_impassable(width, height, rng, impassable_clusters, cluster_size)
+    return Map.from_buffers(width, height, elevations, terrain_mvs, impassable)
+
+
+def get_elevations(width: int, height: int, rng: random.Random, max_elevation: int, scale: int) -> array:
+    """whole-number elevations from 0 to max_elevation. see `get_value_noise`."""
+    elevations = array('d')
+    for row in get_value_noise(width, height, rng, scale, max_elevation + 1):
+        elevations.extend(map(int, row))
+    return elevations
+
+
+def get_value_noise(width: int, height: int, rng: random.Random, scale: int,
+                    amplitude: float = 1.0) -> List[List[float]]:
+    """
+    rows of smooth noise from 0 up to, but not including, amplitude. random values sit on a lattice `scale` apart and
+    everything in between is eased between them. each lattice row is stretched across the width first, so every
+    row of the result is one blend of two stretched rows.
+    """
+    if scale < 1:
+        raise ValueError('scale must be at least 1')
+    lattice_columns = width // scale + 2
+    lattice_rows = height // scale + 2
+    weights = [_ease((x % scale) / scale) for x in range(width)]
+    columns = [x // scale for x in range(width)]
+
+    stretched = []
+    for _ in range(lattice_rows):
+        values = [rng.random() * amplitude for _ in range(lattice_columns)]
+        stretched.append([values[column] + (values[column + 1] - values[column]) * weight
+                          for column, weight in zip(columns, weights)])
+
+    rows = []
+    for band in range(-(-height // scale)):
+        top = stretched[band]
+        differences = [lower - upper for upper, lower in zip(top, stretched[band + 1])]
+        for y in range(band * scale, min(height, (band + 1) * scale)):
+            weight = _ease((y % scale) / scale)
+            rows.append([upper + difference * weight for upper, difference in zip(top, differences)])
+    return rows
+
+
+def _ease(fraction: float) -> float:
+    return fraction * fraction * (3 - 2 * fraction)
+
+
+def get_terrain_mvs(width: int, height: int, rng: random.Random, regions: int, max_terrain_mv: int) -> array:
+    terrain_mvs = array('l', [1]) * (width * height)
+    for _ in range(regions):
+        terrain_mv = rng.randint(min(2, max_terrain_mv), max(max_terrain_mv, 1))
+        x_start = rng.randrange(width)
+        y_start = rng.randrange(height)
+        x_stop = min(width, x_start + rng.randint(1, max(1, width // 4)))
+        y_stop = min(height, y_start + rng.randint(1, max(1, height // 4)))
+        row = array('l', [terrain_mv]) * (x_stop - x_start)
+        for y in range(y_start, y_stop):
+            terrain_mvs[y * width + x_start: y * width + x_stop] = row
+    return terrain_mvs
+
+
+def get_impassable(width: int, height: int, rng: random.Random, clusters: int, cluster_size: int) -> bytearray:
+    """each cluster grows from a random point by adding random neighbours of the points it already has."""
+    impassable = bytearray(width * height)
+    offsets = ((0, 1), (0, -1), (1, 0), (-1, 0))
+    for _ in range(clusters):
+        cluster = [(rng.randrange(width), rng.randrange(height))]
+        impassable[cluster[0][1] * width + cluster[0][0]] = 1
+        for _ in range(cluster_size * 4):
+            if len(cluster) >= cluster_size:
+                break
+            x, y = rng.choice(cluster)
+            del_x, del_y = rng.choice(offsets)
+            x += del_x
+            y += del_y
+            if 0 <= x < width and 0 <= y < height and not impassable[y * width + x]:
+                impassable[y * width + x] = 1
+                cluster.append((x, y))
+    return impassable
@@ -0,0 +1,138 @@
+from array import array
+from typing import Dict, List, Tuple
+
+from battle.maptools.footprint import FootPrint
+from battle.maptools.point import Point
+from battle.maptools.vector import Vector, DangerOpportunity
+
+Field = Tuple[array, array, array, array]
+
+
+class HeatMap(object):
+    """
+    the danger and opportunity that each team's footprints leave on every point of a map. each team has a field of
+    four flat arrays, danger_x, danger_y, opportunity_x and opportunity_y, indexed by y * width + x like `Map`.
+
+    heat is added once for each footprint and stays after the tile's FootPrintPackage has pushed the footprint out. it
+    only goes away with `decay`. `diffuse` spreads it to neighbouring points. see `Map.get_heat_map`.
+    """
+    def __init__(self, width: int, height: int):
+        self._width = width
+        self._height = height
+        self._fields = {}  # type: Dict['Team', Field]
+        self._neighbour_counts = None  # type: List[int]
+
+    def get_size(self):
+        return self._width, self._height
+
+    def get_teams(self) -> list:
+        return list(self._fields)
+
+    def _get_index(self, point: Point):
+        x = point.x
+        y = point.y
+        if 0 <= x < self._width and 0 <= y < self._height:
+            return y * self._width + x
+        return None
+
+    def add_footprint(self, point: Point, footprint: FootPrint):
+        index = self._get_index(point)
+        if index is None:
+            raise ValueError('{} is not on the heat map'.format(point))
+        field = self._fields.get(footprint.team)
+        if field is None:
+            field = self._fields[footprint.team] = _get_empty_field(self._width * self._height)
+        vectors = footprint.vectorize()
+        field[0][index] += vectors.danger.x
+        field[1][index] += vectors.danger.y
+        field[2][index] += vectors.opportunity.x
+        field[3][index] += vectors.opportunity.y
+
+    def get_field(self, team) -> Field:
+        """the team's own arrays: (danger_x, danger_y, opportunity_x, opportunity_y). all zeros for an unknown team."""
+        field = self._fields.get(team)
+        if field is None:
+            return _get_empty_field(self._width * self._height)
+        return field
+
+    def get_vectors(self, team, point: Point) -> DangerOpportunity:
+        return self.get_many_vectors(team, [point])[0]
+
+    def get_many_vectors(self, team, points: List[Point]) -> List[DangerOpportunity]:
+        """one DangerOpportunity for each of points, in order. points off the map are empty."""
+        field = self._fields.get(team)
+        answer = []
+        for point in points:
+            index = self._get_index(point)
+            if field is None or index is None:
+                answer.append(DangerOpportunity.empty())
+            else:
+                answer.append(DangerOpportunity(Vector(field[0][index], field[1][index]),
+                                                Vector(field[2][index], field[3][index])))
+        return answer
+
+    def get_totals(self, team, points: List[Point]) -> List[Tuple[float, float]]:
+        """(danger, opportunity) magnitudes for each of points, for comparing many points at once."""
+        field = self._fields.get(team)
+        answer = []
+        for point in points:
+            index = self._get_index(point)
+            if field is None or index is None:
+                answer.append((0.0, 0.0))
+            else:
+                answer.append((abs(field[0][index]) + abs(field[1][index]),
+                               abs(field[2][index]) + abs(field[3][index])))
+        return answer
+
+    def decay(self, factor: float):
+        """multiply all heat by factor"""
+        if not 0 <= factor <= 1:
+            raise ValueError('factor must be from 0 to 1')
+        for field in self._fields.values():
+            for values in field:
+                values[:] = array('d', [value * factor for value in values])
+
+    def diffuse(self, rate: float):
+        """
+        every point keeps 1 - rate of its heat and passes rate / 4 to each neighbour. at the edges, the share that
+        would go off the map stays, so no heat is lost.
+        """
+        if not 0 <= rate <= 1:
+            raise ValueError('rate must be from 0 to 1')
+        for field in self._fields.values():
+            for values in field:
+                values[:] = self._diffuse_values(values, rate)
+
+    def _diffuse_values(self, values: array, rate: float) -> array:
+        width = self._width
+        share = rate / 4.
+        if self._neighbour_counts is None:
+            self._neighbour_counts = self._get_neighbour_counts()
+        kept = [value * (1 - share * neighbours) for value, neighbours in zip(values, self._neighbour_counts)]
+        out = array('d', kept)
+        for index in range(len(values)):
+            given = values[index] * share
+            if not given:
+                continue
+            x = index % width
+            if x > 0:
+                out[index - 1] += given
+            if x < width - 1:
+                out[index + 1] += given
+            if index >= width:
+                out[index - width] += given
+            if index + width < len(values):
+                out[index + width] += given
+        return out
+
+    def _get_neighbour_counts(self) -> List[int]:
+        width = self._width
+        height = self._height
+        return [(x > 0) + (x < width - 1) + (y > 0) + (y < height - 1) for y in range(height) for x in range(width)]
+
+    def clear(self):
+        self._fields = {}
+
+
+def _get_empty_field(size: int) -> Field:
+    return tuple(array('d', [0.]) * size for _ in range(4))
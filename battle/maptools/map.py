@@ -1,27 +1,196 @@
-from typing import Dict, List, Union
+from array import array
+from enum import Enum
+from itertools import compress
+from math import isinf
+from types import MethodType
+from typing import Callable, Dict, List, Sequence, Set, Tuple, Union
+from weakref import WeakMethod
 
 from battle.maptools.direction import Direction
-from battle.maptools.point import Point
-from battle.maptools.tile import Tile
+from battle.maptools.footprint import FootPrint
+from battle.maptools.heatmap import HeatMap
+from battle.maptools.point import Point, PointCache
+from battle.maptools.tile import Tile, ImpassableTile
 from battle.players.units import Soldier
 
 N, S, E, W = Direction.N, Direction.S, Direction.E, Direction.W
 
+NO_TILE = float('-inf')
+NO_EDGE = -1
+UNIT_BUCKET_SIZE = 8
+DIRECTIONS = tuple(Direction)
+
 
 class MapPlacementError(ValueError):
     def __init__(self, *args):
         super(MapPlacementError, self).__init__(*args)
 
 
+class MapEvent(Enum):
+    TILE_CHANGED = 'tile changed'
+    UNIT_PLACED = 'unit placed'
+    UNIT_REMOVED = 'unit removed'
+    ALL_UNITS_REMOVED = 'all units removed'
+
+
+MapSubscriber = Callable[[MapEvent, Union[Point, None], Union[Soldier, None]], None]
+BuffersOpener = Callable[[], Tuple[Sequence[float], Sequence[int], Sequence[int]]]
+
+
 class Map(object):
+    """
+    tiles, elevations, terrain_mv, impassability and units are kept in flat buffers indexed by y * width + x.
+    occupied points are also grouped in square buckets of UNIT_BUCKET_SIZE so that units near a point can be found
+    without looking at every point.
+
+    `get_edge_costs` is a table of the mv_pts to step from each tile to its neighbour in each of DIRECTIONS,
+    ignoring units. it is built when first asked for and patched when a tile changes.
+
+    tiles are only made when `get_tile` asks for them, so a map can be loaded straight into its buffers with
+    `from_buffers`.
+
+    anything that caches map data can check `get_terrain_version` and `get_unit_version`, or `subscribe` to be told
+    about each change. bound methods are held weakly, so a subscriber goes away with its object.
+    """
     def __init__(self, width: int, height: int, tiles: List[Tile]):
-        self._all_points = Point(0, 0).to_rectangle(width, height)
-        self._tiles = dict.fromkeys(self._all_points, None)  # type: Dict[Point, Tile]
-        self._points_to_units = {}  # type: Dict[Point, Soldier]
+        self._width = width
+        self._height = height
+        self._point_cache = PointCache()
+        size = width * height
+
+        self._tiles = [None] * size  # type: List[Tile]
+        self._elevations = array('d', [NO_TILE]) * size
+        self._terrain_mvs = array('l', [0]) * size
+        self._impassable = bytearray(size)
+
+        self._units = [None] * size  # type: List[Soldier]
         self._units_to_points = {}  # type: Dict[Soldier, Point]
+        self._bucket_columns = -(-width // UNIT_BUCKET_SIZE)
+        self._unit_buckets = {}  # type: Dict[int, Set[Point]]
+
+        self._terrain_version = 0
+        self._unit_version = 0
+        self._subscribers = []  # type: List[Union[WeakMethod, MapSubscriber]]
+        self._edge_costs = None  # type: array
+        self._min_terrain_mv = None  # type: int
+        self._reopen = None  # type: BuffersOpener
+        self._heat_map = HeatMap(width, height)
 
         self._lay_tiles(tiles)
 
+    @classmethod
+    def from_buffers(cls, width: int, height: int, elevations: Sequence[float], terrain_mvs: Sequence[int],
+                     impassable: Sequence[int], copy: bool = True, reopen: BuffersOpener = None) -> 'Map':
+        """
+        a map taken from buffers laid out like the map's own: index = y * width + x. every point gets a tile unless
+        its elevation is NO_TILE.
+
+        :param copy: if True, the buffers are copied and impassable points get the elevation of an ImpassableTile. if
+            False, the map uses the buffers themselves. they must be writable and already hold those elevations.
+        :param reopen: a picklable callable that returns the same three buffers again. until a tile changes, the map
+            is pickled as this instead of as its buffers.
+        """
+        size = width * height
+        if not len(elevations) == len(terrain_mvs) == len(impassable) == size:
+            raise MapPlacementError('buffers must have width * height values')
+        map_ = cls(width, height, [])
+        map_._reopen = reopen
+        if not copy:
+            map_._elevations = elevations
+            map_._terrain_mvs = terrain_mvs
+            map_._impassable = impassable
+            return map_
+
+        map_._elevations = array('d', elevations)
+        map_._terrain_mvs = array('l', terrain_mvs)
+        map_._impassable = bytearray(impassable)
+        inf = float('inf')
+        index = map_._impassable.find(1)
+        while index != -1:
+            map_._elevations[index] = inf
+            index = map_._impassable.find(1, index + 1)
+        return map_
+
+    def get_buffers(self) -> Tuple[Sequence[float], Sequence[int], Sequence[int]]:
+        """the map's own elevations, terrain_mvs and impassable buffers. use `set_tile` to change them."""
+        return self._elevations, self._terrain_mvs, self._impassable
+
+    def get_index(self, point: Point) -> Union[int, None]:
+        """index of the point in the flat buffers. None if off the map."""
+        x = point.x
+        y = point.y
+        if 0 <= x < self._width and 0 <= y < self._height:
+            return y * self._width + x
+        return None
+
+    def get_point_at_index(self, index: int) -> Point:
+        return self._point_cache.get(index % self._width, index // self._width)
+
+    def get_index_offsets(self) -> Tuple[int, ...]:
+        """what to add to an index to step in each of DIRECTIONS"""
+        return tuple(direction.value[0] + direction.value[1] * self._width for direction in DIRECTIONS)
+
+    def get_edge_costs(self) -> array:
+        """
+        mv_pts from the tile at index to its neighbour in DIRECTIONS[n] is at `index * 4 + n`. NO_EDGE if either
+        tile is missing or the step can't be made. the same values as `Tile.move_pts`. units are not included.
+        """
+        if self._edge_costs is None:
+            self._edge_costs = self._build_edge_costs()
+        return self._edge_costs
+
+    def _build_edge_costs(self) -> array:
+        """
+        one pass per direction over the elevations and the elevations shifted by a step, written into the table with a
+        strided slice. missing and impassable tiles can't go through that sum, so they are filled in afterwards.
+        """
+        width = self._width
+        size = width * self._height
+        elevations = self._elevations
+        terrain_mvs = self._terrain_mvs
+        infinite = list(compress(range(size), map(isinf, elevations)))
+        if infinite:
+            elevations = array('d', elevations)
+            for index in infinite:
+                elevations[index] = 0.
+        edge_costs = array('l', [NO_EDGE]) * (4 * size)
+        for direction_index, direction in enumerate(DIRECTIONS):
+            del_x, del_y = direction.value
+            offset = del_x + del_y * width
+            start = max(0, -offset)
+            stop = min(size, size - offset)
+            edge_costs[start * 4 + direction_index: stop * 4 + direction_index: 4] = array('l', [
+                terrain_mv if other <= elevation else terrain_mv + int(other - elevation)
+                for elevation, other, terrain_mv in zip(elevations[start:stop], elevations[start + offset:stop + offset],
+                                                        terrain_mvs[start:stop])])
+            if del_x:
+                edge_column = width - 1 if del_x > 0 else 0
+                edge_costs[edge_column * 4 + direction_index::4 * width] = array('l', [NO_EDGE]) * self._height
+        self._edge_costs = edge_costs
+        for index in infinite:
+            self._update_edge_costs_around(self.get_point_at_index(index))
+        return edge_costs
+
+    def _set_edge_costs_from(self, index: int):
+        x = index % self._width
+        y = index // self._width
+        for direction_index, direction in enumerate(DIRECTIONS):
+            del_x, del_y = direction.value
+            cost = NO_EDGE
+            if self.contains_xy(x + del_x, y + del_y):
+                other_index = index + del_x + del_y * self._width
+                cost = get_edge_cost(self._elevations[index], self._elevations[other_index], self._terrain_mvs[index])
+            self._edge_costs[index * 4 + direction_index] = cost
+
+    def _update_edge_costs_around(self, point: Point):
+        if self._edge_costs is None:
+            return None
+        self._set_edge_costs_from(self.get_index(point))
+        for direction in DIRECTIONS:
+            index = self.get_index(point.in_direction(direction))
+            if index is not None:
+                self._set_edge_costs_from(index)
+
     def _lay_tiles(self, tiles: List[Tile]):
         pointed, pointless = separate_tiles(tiles)
         self._lay_pointed_tiles(pointed)
@@ -30,8 +199,7 @@ class Map(object):
     def _lay_pointed_tiles(self, tiles: List[Tile]):
         for tile in tiles:
             self._raise_placement_error(tile)
-            point = tile.get_point()
-            self._tiles[point] = tile
+            self._store_tile(tile)
 
     def _raise_placement_error(self, tile: Tile):
         point = tile.get_point()
@@ -39,61 +207,251 @@ class Map(object):
             raise MapPlacementError('Occupied or missing')
 
     def _lay_pointless_tiles(self, tiles: List[Tile]):
-        available_points = [key for key in self._all_points if not self._tiles[key]]
-        _raise_too_many_tiles_error(tiles, available_points)
-        for tile in tiles:
-            point = available_points.pop(0)
-            tile.set_point(point)
-            self._tiles[point] = tile
+        if not tiles:
+            return None
+        available = [index for index, elevation in enumerate(self._elevations) if elevation == NO_TILE]
+        _raise_too_many_tiles_error(tiles, available)
+        for tile, index in zip(tiles, available):
+            tile.set_point(self.get_point_at_index(index))
+            self._store_tile(tile)
+
+    def _store_tile(self, tile: Tile):
+        """footprints already on the tile go on the heat map. ones added later get there through the listener."""
+        point = tile.get_point()
+        index = self.get_index(point)
+        old_tile = self._tiles[index]
+        if old_tile is not tile:
+            if old_tile is not None:
+                old_tile.set_footprint_listener(None)
+            self._tiles[index] = tile
+            tile.set_footprint_listener(self._on_footprint)
+            for footprint in reversed(tile.get_footprints()):
+                self._heat_map.add_footprint(point, footprint)
+        self._elevations[index] = tile.get_elevation()
+        self._terrain_mvs[index] = tile.get_terrain_mv()
+        self._impassable[index] = isinstance(tile, ImpassableTile)
+
+    def set_tile(self, tile: Tile):
+        """replace the tile at `tile.get_point()`. units on the map are not moved."""
+        point = tile.get_point()
+        if point is None or not self.is_on_map(point):
+            raise MapPlacementError('tile must have a point on the map')
+        self._store_tile(tile)
+        self._update_edge_costs_around(point)
+        self._min_terrain_mv = None
+        self._terrain_version += 1
+        self._notify(MapEvent.TILE_CHANGED, point, None)
+
+    def get_terrain_version(self) -> int:
+        """goes up every time a tile changes."""
+        return self._terrain_version
+
+    def get_unit_version(self) -> int:
+        """goes up every time a unit is placed or removed."""
+        return self._unit_version
+
+    def subscribe(self, subscriber: MapSubscriber):
+        """subscriber(event, point, unit) is called after every change. point and unit are None if they don't apply."""
+        if isinstance(subscriber, MethodType):
+            self._subscribers.append(WeakMethod(subscriber))
+        else:
+            self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: MapSubscriber):
+        self._subscribers = [held for held in self._subscribers if _get_subscriber(held) not in (subscriber, None)]
+
+    def _notify(self, event: MapEvent, point: Union[Point, None], unit: Union[Soldier, None]):
+        if any(_get_subscriber(held) is None for held in self._subscribers):
+            self._subscribers = [held for held in self._subscribers if _get_subscriber(held) is not None]
+        for held in self._subscribers[:]:
+            subscriber = _get_subscriber(held)
+            if subscriber is not None:
+                subscriber(event, point, unit)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_subscribers'] = []
+        if self._reopen is not None and self._terrain_version == 0:
+            state['_elevations'] = state['_terrain_mvs'] = state['_impassable'] = None
+        elif not isinstance(self._elevations, array):
+            state['_elevations'] = array('d', self._elevations)
+            state['_terrain_mvs'] = array('l', self._terrain_mvs)
+            state['_impassable'] = bytearray(self._impassable)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._elevations is None:
+            self._elevations, self._terrain_mvs, self._impassable = self._reopen()
+        for tile in self._tiles:
+            if tile is not None:
+                tile.set_footprint_listener(self._on_footprint)
 
     def get_elevation(self, point: Point) -> Union[int, float]:
-        if not self.has_tile(point):
-            return float('-inf')
-        return self.get_tile(point).get_elevation()
+        """the same as `Tile.get_elevation`: an int, or inf for an ImpassableTile. -inf if there is no tile."""
+        index = self.get_index(point)
+        if index is None:
+            return NO_TILE
+        elevation = self._elevations[index]
+        if isinf(elevation):
+            return elevation
+        return int(elevation)
 
     def get_size(self):
-        last_point = self._all_points[-1]
-        return last_point.x + 1, last_point.y + 1
+        return self._width, self._height
+
+    def get_point_cache(self) -> PointCache:
+        """shared points for this map. `get_point_at_index` hands out points from it."""
+        return self._point_cache
 
     def is_on_map(self, point: Point) -> bool:
-        return point in self._all_points
+        return self.contains_xy(point.x, point.y)
+
+    def contains_xy(self, x: int, y: int) -> bool:
+        """same as `is_on_map` without building a Point"""
+        return 0 <= x < self._width and 0 <= y < self._height
 
     def has_tile(self, point: Point) -> bool:
-        return self.is_on_map(point) and self._tiles[point]
+        index = self.get_index(point)
+        return index is not None and self._elevations[index] != NO_TILE
 
     def get_tile(self, point: Point) -> Tile:
-        return self._tiles[point]
+        index = self.get_index(point)
+        if index is None:
+            return None
+        tile = self._tiles[index]
+        if tile is None and self._elevations[index] != NO_TILE:
+            tile = self._make_tile(index)
+        return tile
+
+    def _make_tile(self, index: int) -> Tile:
+        point = self.get_point_at_index(index)
+        if self._impassable[index]:
+            tile = ImpassableTile(terrain_mv=self._terrain_mvs[index], point=point)
+        else:
+            tile = Tile(elevation=self._elevations[index], terrain_mv=self._terrain_mvs[index], point=point)
+        self._tiles[index] = tile
+        tile.set_footprint_listener(self._on_footprint)
+        return tile
+
+    def get_heat_map(self) -> HeatMap:
+        """
+        every footprint on the map's tiles, counted once: when its tile was laid or set, or when it was added after
+        that. tiles that are replaced stop adding to it.
+        """
+        return self._heat_map
+
+    def _on_footprint(self, tile: Tile, footprint: FootPrint):
+        self._heat_map.add_footprint(tile.get_point(), footprint)
+
+    def get_terrain_mv(self, point: Point) -> int:
+        """0 when there is no tile"""
+        index = self.get_index(point)
+        if index is None:
+            return 0
+        return self._terrain_mvs[index]
+
+    def get_min_terrain_mv(self) -> int:
+        """smallest terrain_mv of any tile, so no step on the map costs less. 1 if there are no tiles."""
+        if self._min_terrain_mv is None:
+            terrain_mvs = [terrain_mv for terrain_mv, elevation in zip(self._terrain_mvs, self._elevations)
+                           if elevation != NO_TILE]
+            self._min_terrain_mv = min(terrain_mvs, default=1)
+        return self._min_terrain_mv
+
+    def is_impassable(self, point: Point) -> bool:
+        index = self.get_index(point)
+        return index is not None and bool(self._impassable[index])
 
     def can_place_unit(self, point: Point) -> bool:
-        return self.has_tile(point) and self._points_to_units.get(point) is None
+        index = self.get_index(point)
+        return index is not None and self._elevations[index] != NO_TILE and self._units[index] is None
 
     def place_unit(self, unit: Soldier, point: Point):
         self._raise_unit_placement_error(point, unit)
-        self._points_to_units[point] = unit
+        self._units[self.get_index(point)] = unit
         self._units_to_points[unit] = point
+        self._unit_buckets.setdefault(self._get_bucket(point.x, point.y), set()).add(point)
+        self._unit_version += 1
+        self._notify(MapEvent.UNIT_PLACED, point, unit)
+
+    def _get_bucket(self, x: int, y: int) -> int:
+        return (y // UNIT_BUCKET_SIZE) * self._bucket_columns + x // UNIT_BUCKET_SIZE
 
     def _raise_unit_placement_error(self, point: Point, unit: Soldier):
         if not self.can_place_unit(point) or self.get_point(unit):
             raise MapPlacementError('illegal unit placement')
 
     def get_unit(self, point: Point) -> Soldier:
-        return self._points_to_units.get(point)
+        index = self.get_index(point)
+        if index is None:
+            return None
+        return self._units[index]
 
     def get_point(self, unit: Soldier) -> Point:
         return self._units_to_points.get(unit)
 
+    def has_unit_at_index(self, index: int) -> bool:
+        return self._units[index] is not None
+
     def has_unit(self, point: Point) -> bool:
-        return self._points_to_units.get(point) is not None
+        index = self.get_index(point)
+        return index is not None and self._units[index] is not None
 
     def remove_unit(self, point: Point):
-        unit = self._points_to_units[point]
-        self._points_to_units[point] = None
+        index = self.get_index(point)
+        if index is None:
+            return None
+        unit = self._units[index]
+        self._units[index] = None
         if unit is not None:
             del self._units_to_points[unit]
+            bucket = self._get_bucket(point.x, point.y)
+            self._unit_buckets[bucket].discard(point)
+            if not self._unit_buckets[bucket]:
+                del self._unit_buckets[bucket]
+            self._unit_version += 1
+            self._notify(MapEvent.UNIT_REMOVED, point, unit)
 
     def remove_all_units(self):
-        self._points_to_units = {}
+        self._units = [None] * len(self._units)
         self._units_to_points = {}
+        self._unit_buckets = {}
+        self._unit_version += 1
+        self._notify(MapEvent.ALL_UNITS_REMOVED, None, None)
+
+    def get_unit_points_near(self, origin: Point, max_distance: int) -> List[Point]:
+        """points with units on them that are no further than max_distance from origin. in no particular order."""
+        x = origin.x
+        y = origin.y
+        bucket_xs = range(max(0, x - max_distance) // UNIT_BUCKET_SIZE,
+                          min(self._width - 1, x + max_distance) // UNIT_BUCKET_SIZE + 1)
+        bucket_ys = range(max(0, y - max_distance) // UNIT_BUCKET_SIZE,
+                          min(self._height - 1, y + max_distance) // UNIT_BUCKET_SIZE + 1)
+        if len(bucket_xs) * len(bucket_ys) > len(self._unit_buckets):
+            buckets = self._unit_buckets.values()
+        else:
+            buckets = [self._unit_buckets.get(bucket_y * self._bucket_columns + bucket_x, ())
+                       for bucket_y in bucket_ys for bucket_x in bucket_xs]
+        return [point for bucket in buckets for point in bucket
+                if abs(point.x - x) + abs(point.y - y) <= max_distance]
+
+
+def _get_subscriber(held: Union[WeakMethod, MapSubscriber]) -> Union[MapSubscriber, None]:
+    if isinstance(held, WeakMethod):
+        return held()
+    return held
+
+
+def get_edge_cost(elevation: float, other_elevation: float, terrain_mv: int) -> int:
+    """`Tile.move_pts` from buffer values. NO_EDGE if a tile is missing or the other tile is impassable."""
+    if elevation == NO_TILE or other_elevation == NO_TILE:
+        return NO_EDGE
+    if other_elevation > elevation:
+        if other_elevation == float('inf'):
+            return NO_EDGE
+        return terrain_mv + int(other_elevation - elevation)
+    return terrain_mv
 
 
 def separate_tiles(tiles):
@@ -0,0 +1,98 @@
+"""
+save a map's terrain to a file and load it back memory-mapped, so many battles and processes can share one copy.
+
+a file is a HEADER followed by the elevations (float64), terrain_mvs (int64) and impassable flags (one byte each) of
+every point, in the order of `Map.get_index`. numbers are in the byte order of the machine that saved the file. tiles'
+footprints and units are not saved.
+
+a loaded map reads the file's pages straight from the page cache. they are mapped copy-on-write, so changing a tile
+only copies the page it is on, and never touches the file.
+"""
+import mmap
+import struct
+import sys
+from array import array
+from functools import partial
+from typing import Tuple
+
+from battle.maptools.map import Map
+
+MAGIC = b'BMAP'
+VERSION = 1
+HEADER = struct.Struct('<4sHcxII')
+BYTE_ORDERS = {'little': b'<', 'big': b'>'}
+
+
+class MapFileError(ValueError):
+    def __init__(self, *args):
+        super(MapFileError, self).__init__(*args)
+
+
+def save_map(map_: Map, path: str):
+    width, height = map_.get_size()
+    elevations, terrain_mvs, impassable = map_.get_buffers()
+    with open(path, 'wb') as map_file:
+        map_file.write(HEADER.pack(MAGIC, VERSION, BYTE_ORDERS[sys.byteorder], width, height))
+        map_file.write(array('d', elevations).tobytes())
+        map_file.write(array('q', terrain_mvs).tobytes())
+        map_file.write(bytes(impassable))
+
+
+def load_map(path: str, use_mmap: bool = True) -> Map:
+    """
+    :param use_mmap: if False, or if the file was saved with the other byte order, the file is read into new buffers
+        instead.
+    """
+    width, height, byte_order = read_header(path)
+    if not use_mmap or byte_order != BYTE_ORDERS[sys.byteorder]:
+        return Map.from_buffers(width, height, *read_buffers(path))
+    return Map.from_buffers(width, height, *open_buffers(path), copy=False, reopen=partial(open_buffers, path))
+
+
+def read_header(path: str) -> Tuple[int, int, bytes]:
+    """width, height, byte_order"""
+    with open(path, 'rb') as map_file:
+        header = map_file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise MapFileError('{} is too short to be a map file'.format(path))
+    magic, version, byte_order, width, height = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise MapFileError('{} is not a map file'.format(path))
+    if version != VERSION:
+        raise MapFileError('{} is version {}. only version {} can be read'.format(path, version, VERSION))
+    return width, height, byte_order
+
+
+def open_buffers(path: str) -> Tuple[memoryview, memoryview, memoryview]:
+    """elevations, terrain_mvs and impassable as writable copy-on-write views of the file."""
+    width, height, _ = read_header(path)
+    with open(path, 'rb') as map_file:
+        mapped = mmap.mmap(map_file.fileno(), 0, access=mmap.ACCESS_COPY)
+    view = memoryview(mapped)
+    _check_length(path, len(view), width * height)
+    elevations_stop = HEADER.size + 8 * width * height
+    terrain_mvs_stop = elevations_stop + 8 * width * height
+    return (view[HEADER.size:elevations_stop].cast('d'),
+            view[elevations_stop:terrain_mvs_stop].cast('q'),
+            view[terrain_mvs_stop:terrain_mvs_stop + width * height])
+
+
+def read_buffers(path: str) -> Tuple[array, array, bytearray]:
+    """elevations, terrain_mvs and impassable copied out of the file, in this machine's byte order."""
+    width, height, byte_order = read_header(path)
+    with open(path, 'rb') as map_file:
+        data = map_file.read()
+    _check_length(path, len(data), width * height)
+    elevations_stop = HEADER.size + 8 * width * height
+    terrain_mvs_stop = elevations_stop + 8 * width * height
+    elevations = array('d', data[HEADER.size:elevations_stop])
+    terrain_mvs = array('q', data[elevations_stop:terrain_mvs_stop])
+    if byte_order != BYTE_ORDERS[sys.byteorder]:
+        elevations.byteswap()
+        terrain_mvs.byteswap()
+    return elevations, terrain_mvs, bytearray(data[terrain_mvs_stop:terrain_mvs_stop + width * height])
+
+
+def _check_length(path: str, length: int, size: int):
+    if length != HEADER.size + 17 * size:
+        raise MapFileError('{} should be {} bytes long, not {}'.format(path, HEADER.size + 17 * size, length))
@@ -1,14 +1,19 @@
+from functools import lru_cache
+
 from battle.maptools.direction import Direction
-from typing import List, Any, Generator
+from typing import List, Any, Generator, Iterable, Dict, Tuple
 
 
 N, S, E, W = Direction.N, Direction.S, Direction.E, Direction.W
 
 
 class Point(object):
+    __slots__ = ('_x', '_y', '_hash')
+
     def __init__(self, x: int, y: int) -> None:
         self._x = x
         self._y = y
+        self._hash = hash((x, y))
 
     @property
     def x(self) -> int:
@@ -19,15 +24,17 @@ class Point(object):
         return self._y
 
     def __eq__(self, other: Any):
+        if other is self:
+            return True
         if not isinstance(other, Point):
             return False
-        return (self.x, self.y) == (other.x, other.y)
+        return self._x == other._x and self._y == other._y
 
     def __ne__(self, other: Any):
         return not self == other
 
     def __lt__(self, other: 'Point'):
-        return (self.y, self.x) < (other.y, other.x)
+        return (self._y, self._x) < (other._y, other._x)
 
     def __le__(self, other: 'Point'):
         return self == other or self < other
@@ -45,7 +52,7 @@ class Point(object):
         return '({}, {})'.format(self._x, self._y)
 
     def __hash__(self):
-        return hash(repr(self))
+        return self._hash
 
     def in_direction(self, direction: Direction) -> 'Point':
         del_x, del_y = direction.value
@@ -54,25 +61,22 @@ class Point(object):
     def plus(self, x: int, y: int) -> 'Point':
         return Point(self._x + x, self._y + y)
 
-    def at_distance(self, distance: int) -> List['Point']:
+    def at_distance(self, distance: int, cache: 'PointCache' = None) -> List['Point']:
+        """
+        :param cache: if given, points come from the cache instead of being created.
+        """
         if distance == 0:
             return [self]
-        out = []
-        for del_x in range(-distance, distance + 1):
-            del_y = distance - abs(del_x)
-            out.append(self.plus(del_x, del_y))
-            if del_y != 0:
-                out.append(self.plus(del_x, - del_y))
-        return sorted(out)
+        make_point = Point if cache is None else cache.get
+        x = self._x
+        y = self._y
+        return [make_point(x + del_x, y + del_y) for del_x, del_y in get_ring_offsets(distance)]
 
     def to_rectangle(self, x_size: int, y_size: int) -> List['Point']:
-        out = []
-        x_range = get_range(x_size)
-        y_range = get_range(y_size)
-        for del_x in x_range:
-            for del_y in y_range:
-                out.append(self.plus(del_x, del_y))
-        return sorted(out)
+        """sorted. built row by row in Point order, so no sort is needed."""
+        xs = sorted(self._x + del_x for del_x in get_range(x_size))
+        ys = sorted(self._y + del_y for del_y in get_range(y_size))
+        return [Point(x, y) for y in ys for x in xs]
 
     def generate_path(self, path: List[Direction]) -> Generator['Point', None, None]:
 
@@ -85,6 +89,41 @@ class Point(object):
         return path_generator(self, path)
 
 
+class PointCache(object):
+    """hands out one shared Point for each (x, y) so that hot loops don't allocate a new Point every time."""
+    def __init__(self, points: Iterable[Point] = ()):
+        self._points = {(point.x, point.y): point for point in points}  # type: Dict[Tuple[int, int], Point]
+
+    def get(self, x: int, y: int) -> Point:
+        key = (x, y)
+        point = self._points.get(key)
+        if point is None:
+            point = Point(x, y)
+            self._points[key] = point
+        return point
+
+    def __len__(self):
+        return len(self._points)
+
+    def clear(self):
+        self._points = {}
+
+
+@lru_cache(maxsize=None)
+def get_ring_offsets(distance: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    (del_x, del_y) of every point at `distance` from the origin, sorted in Point order. adding the offsets to any
+    point keeps them sorted, so the table is shared by every origin.
+    """
+    out = []
+    for del_x in range(-distance, distance + 1):
+        del_y = distance - abs(del_x)
+        out.append((del_x, del_y))
+        if del_y != 0:
+            out.append((del_x, -del_y))
+    return tuple(sorted(out, key=lambda offset: (offset[1], offset[0])))
+
+
 def get_range(stop_by):
     if stop_by < 0:
         return range(0, stop_by, -1)
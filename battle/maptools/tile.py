@@ -1,7 +1,12 @@
-from typing import Union
+from types import MethodType
+from typing import Callable, Union
+from weakref import WeakMethod
+
 from battle.maptools.point import Point
 from battle.maptools.footprint import FootPrintPackage, FootPrint
 
+FootPrintListener = Callable[['Tile', FootPrint], None]
+
 
 class Tile(object):
     def __init__(self, elevation: Union[int, float] = 0, terrain_mv: int = 1, point: Point = None, max_footprints=10):
@@ -12,9 +17,34 @@ class Tile(object):
         self._terrain_mv = max(terrain_mv, 1)
         self._point = point
         self._fpp = FootPrintPackage(max_size=max_footprints)
+        self._footprint_listener = None  # type: Union[WeakMethod, FootPrintListener, None]
+
+    def __getstate__(self):
+        """the listener is left behind. a copied Map sets it again on its tiles."""
+        state = self.__dict__.copy()
+        state['_footprint_listener'] = None
+        return state
 
     def add_footprint(self, footprint: FootPrint):
         self._fpp.push(footprint)
+        listener = self._footprint_listener
+        if isinstance(listener, WeakMethod):
+            listener = listener()
+        if listener is not None:
+            listener(self, footprint)
+
+    def set_footprint_listener(self, listener: Union[FootPrintListener, None]):
+        """
+        listener(tile, footprint) is called after each footprint is added. a Map sets this on its tiles. like
+        `Map.subscribe`, a bound method is held weakly so the tile does not keep its owner alive.
+        """
+        if isinstance(listener, MethodType):
+            listener = WeakMethod(listener)
+        self._footprint_listener = listener
+
+    def get_footprints(self):
+        """newest first"""
+        return self._fpp.footprints
 
     def footprint_vectors(self):
         return self._fpp.team_vectors()
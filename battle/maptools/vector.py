@@ -1,7 +1,11 @@
+from typing import Iterable
+
 from battle.maptools.direction import Direction
 
 
 class Vector(object):
+    __slots__ = ('_x', '_y')
+
     def __init__(self, x, y):
         self._x = x
         self._y = y
@@ -20,7 +24,7 @@ class Vector(object):
         return self._y
 
     def add(self, other):
-        return Vector(self.x + other.x, self.y + other.y)
+        return Vector(self._x + other.x, self._y + other.y)
 
     def direction_tuple(self):
         x_dir = Direction.E
@@ -38,13 +42,21 @@ class Vector(object):
     def __eq__(self, other):
         if not isinstance(other, Vector):
             return False
-        return self.x == other.x and self.y == other.y
+        return self._x == other._x and self._y == other._y
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self._x, self._y))
 
     def __repr__(self):
         return 'Vector({}, {})'.format(self.x, self.y)
 
 
 class DangerOpportunity(object):
+    __slots__ = ('_danger', '_opportunity')
+
     def __init__(self, danger: Vector, opportunity: Vector):
         self._danger = danger
         self._opportunity = opportunity
@@ -69,4 +81,79 @@ class DangerOpportunity(object):
     def __eq__(self, other):
         if not isinstance(other, DangerOpportunity):
             return False
-        return (self.danger, self.opportunity) == (other.danger, other.opportunity)
\ No newline at end of file
+        return (self.danger, self.opportunity) == (other.danger, other.opportunity)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self._danger, self._opportunity))
+
+    def __repr__(self):
+        return 'DangerOpportunity({!r}, {!r})'.format(self._danger, self._opportunity)
+
+
+class VectorSum(object):
+    """a running total that is added to in place. use it instead of chaining Vector.add in a loop."""
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+
+    def add(self, vector: Vector):
+        self.x += vector.x
+        self.y += vector.y
+
+    def subtract(self, vector: Vector):
+        self.x -= vector.x
+        self.y -= vector.y
+
+    def to_vector(self) -> Vector:
+        return Vector(self.x, self.y)
+
+
+class DangerOpportunitySum(object):
+    """a running total of DangerOpportunity that is added to in place."""
+    __slots__ = ('danger_x', 'danger_y', 'opportunity_x', 'opportunity_y')
+
+    def __init__(self):
+        self.danger_x = 0
+        self.danger_y = 0
+        self.opportunity_x = 0
+        self.opportunity_y = 0
+
+    def add(self, danger_opportunity: DangerOpportunity):
+        danger = danger_opportunity.danger
+        opportunity = danger_opportunity.opportunity
+        self.danger_x += danger.x
+        self.danger_y += danger.y
+        self.opportunity_x += opportunity.x
+        self.opportunity_y += opportunity.y
+
+    def subtract(self, danger_opportunity: DangerOpportunity):
+        danger = danger_opportunity.danger
+        opportunity = danger_opportunity.opportunity
+        self.danger_x -= danger.x
+        self.danger_y -= danger.y
+        self.opportunity_x -= opportunity.x
+        self.opportunity_y -= opportunity.y
+
+    def to_danger_opportunity(self) -> DangerOpportunity:
+        return DangerOpportunity(Vector(self.danger_x, self.danger_y), Vector(self.opportunity_x, self.opportunity_y))
+
+
+def sum_vectors(vectors: Iterable[Vector]) -> Vector:
+    """Vector(0, 0) when there are none"""
+    total = VectorSum()
+    for vector in vectors:
+        total.add(vector)
+    return total.to_vector()
+
+
+def sum_danger_opportunities(danger_opportunities: Iterable[DangerOpportunity]) -> DangerOpportunity:
+    """DangerOpportunity.empty() when there are none"""
+    total = DangerOpportunitySum()
+    for danger_opportunity in danger_opportunities:
+        total.add(danger_opportunity)
+    return total.to_danger_opportunity()
@@ -1,95 +1,388 @@
-from typing import Dict, Tuple, List
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappush, heappop
+from typing import Dict, Tuple, List, Union
 
-from battle.maptools.map import Map
+from battle.maptools.map import Map, DIRECTIONS, NO_EDGE
 from battle.maptools.point import Point
 from battle.maptools.direction import Direction
+from battle.players.team import Team
+from battle.players.units import Soldier
 
 
 PtsToMvAndPath = Dict[Point, Tuple[Point, List[Direction]]]
 
+NO_DISTANCE = -1
+DISTANCE_FIELDS_KEPT = 16
+
 
 class MovementCalculator(object):
-    def __init__(self, map_: Map):
+    def __init__(self, map_: Map, distance_fields_kept: int = DISTANCE_FIELDS_KEPT):
+        """
+        :param distance_fields_kept: how many of the most recently used distance fields are kept. each one is the size
+            of the map.
+        """
         self._map = map_
+        self._distance_fields = OrderedDict()  # type: Dict[Tuple[Point, Union[int, None]], DistanceField]
+        self._distance_fields_kept = distance_fields_kept
+        self._distance_fields_version = map_.get_terrain_version()
+
+    def find_path(self, start: Point, finish: Point, max_mv: int = None) -> Union[List[Direction], None]:
+        """
+        A* search for a cheapest path from start to finish that avoids units, for `Point.generate_path`. the
+        heuristic is manhattan distance times `Map.get_min_terrain_mv`, which never overestimates, so the path costs
+        the same mv_pts as the one from `get_movement_paths`.
+
+        :return: None if finish can't be reached (within max_mv).
+        """
+        start_index = self._map.get_index(start)
+        finish_index = self._map.get_index(finish)
+        if start_index is None or finish_index is None:
+            return None
+        if start_index == finish_index:
+            return []
+        if self._map.has_unit_at_index(finish_index):
+            return None
+
+        edge_costs = self._map.get_edge_costs()
+        offsets = self._map.get_index_offsets()
+        has_unit_at_index = self._map.has_unit_at_index
+        width = self._map.get_size()[0]
+        min_step = self._map.get_min_terrain_mv()
+        finish_x = finish.x
+        finish_y = finish.y
+
+        mv_pts = {start_index: 0}
+        last_steps = {}
+        closed = set()
+        queue = [(0, 0, start_index)]
+        while queue:
+            _, current_mv_pts, index = heappop(queue)
+            if index == finish_index:
+                return _rebuild_path(finish_index, start_index, last_steps, offsets)
+            if index in closed:
+                continue
+            closed.add(index)
+            for direction_index in range(4):
+                step = edge_costs[index * 4 + direction_index]
+                if step == NO_EDGE:
+                    continue
+                neighbour = index + offsets[direction_index]
+                if neighbour in closed or has_unit_at_index(neighbour):
+                    continue
+                new_mv_pts = current_mv_pts + step
+                if max_mv is not None and new_mv_pts > max_mv:
+                    continue
+                old_mv_pts = mv_pts.get(neighbour)
+                if old_mv_pts is None or new_mv_pts < old_mv_pts:
+                    mv_pts[neighbour] = new_mv_pts
+                    last_steps[neighbour] = direction_index
+                    estimate = (abs(neighbour % width - finish_x) + abs(neighbour // width - finish_y)) * min_step
+                    heappush(queue, (new_mv_pts + estimate, new_mv_pts, neighbour))
+        return None
+
+    def get_distance_field(self, goal: Point, max_mv: int = None) -> 'DistanceField':
+        """
+        mv_pts from every point to goal, worked out once with a search backwards from goal. units are ignored, so
+        many units can share one field. the most recently used fields are kept until the terrain changes or
+        `clear_distance_fields`.
+
+        :param max_mv: stop searching past this. points further away are unreachable.
+        """
+        if self._distance_fields_version != self._map.get_terrain_version():
+            self.clear_distance_fields()
+        key = (goal, max_mv)
+        field = self._distance_fields.get(key)
+        if field is None:
+            field = self._distance_fields[key] = DistanceField(self._map, goal, self._search_to(goal, max_mv))
+            if len(self._distance_fields) > self._distance_fields_kept:
+                self._distance_fields.popitem(last=False)
+        else:
+            self._distance_fields.move_to_end(key)
+        return field
+
+    def clear_distance_fields(self):
+        self._distance_fields = OrderedDict()
+        self._distance_fields_version = self._map.get_terrain_version()
+
+    def _search_to(self, goal: Point, max_mv: Union[int, None]) -> array:
+        goal_index = self._map.get_index(goal)
+        width, height = self._map.get_size()
+        distances = array('l', [NO_DISTANCE]) * (width * height)
+        if goal_index is None or (max_mv is not None and max_mv < 0):
+            return distances
+
+        edge_costs = self._map.get_edge_costs()
+        offsets = self._map.get_index_offsets()
+        opposites = [DIRECTIONS.index(direction.opposite()) for direction in DIRECTIONS]
+        settled = set()
+        distances[goal_index] = 0
+        queue = [(0, goal_index)]
+        while queue:
+            distance, index = heappop(queue)
+            if index in settled:
+                continue
+            settled.add(index)
+            x = index % width
+            y = index // width
+            for direction_index, direction in enumerate(DIRECTIONS):
+                if not self._map.contains_xy(x + direction.value[0], y + direction.value[1]):
+                    continue
+                neighbour = index + offsets[direction_index]
+                step = edge_costs[neighbour * 4 + opposites[direction_index]]
+                if step == NO_EDGE or neighbour in settled:
+                    continue
+                new_distance = distance + step
+                if max_mv is not None and new_distance > max_mv:
+                    continue
+                old_distance = distances[neighbour]
+                if old_distance == NO_DISTANCE or new_distance < old_distance:
+                    distances[neighbour] = new_distance
+                    heappush(queue, (new_distance, neighbour))
+        return distances
+
+    def get_team_movement_paths(self, team: Team, processes: int = None) -> Dict[Soldier, 'MovementPaths']:
+        """
+        `get_movement_paths` for every deployed unit on the team, using its action points as max_mv. every search
+        reads the map's edge-cost table, which is only built once.
+
+        :param processes: if given, split the units across a pool of this many processes.
+        """
+        units = team.deployed
+        searches = [(self._map.get_point(unit), unit.get_action_points()) for unit in units]
+        if processes:
+            chunks = [searches[start::processes] for start in range(processes)]
+            with ProcessPoolExecutor(processes, initializer=_set_worker_calculator, initargs=(self._map,)) as executor:
+                chunk_results = list(executor.map(_get_worker_movement_paths, chunks))
+            results = [None] * len(searches)
+            for start, chunk_result in enumerate(chunk_results):
+                results[start::processes] = chunk_result
+        else:
+            results = [self.get_movement_paths(point, max_mv) for point, max_mv in searches]
+        return dict(zip(units, results))
 
     def get_movement_points_with_path(self, start: Point, max_mv: int) -> PtsToMvAndPath:
         """
+        compatibility view of `get_movement_paths`. every path is rebuilt, so prefer `get_movement_paths` and
+        `MovementPaths.path_to` when only some paths are needed.
 
         {Point: (mv_pts_from_start, [path_from_start])}
         """
-        edges = {start}
-        start_movement_values = {start: (0, [])}
-        max_val = (max_mv, [Direction.N] * self._map.get_size()[1])
+        return self.get_movement_paths(start, max_mv).to_dict()
 
-        raw_movement_values = self._create_raw_movement_values(edges, max_val, start_movement_values)
-
-        return _remove_values_above_cutoff(raw_movement_values, max_val)
+    def get_movement_paths(self, start: Point, max_mv: int) -> 'MovementPaths':
+        """
+        heap-based search. each point is settled once, in order of mv_pts, and stores only the direction it was
+        reached from. ties in mv_pts go to the path that sorts first.
+        """
+        result = MovementPaths(start)
+        mv_pts, last_steps = self._search(start, max_mv, with_paths=True)
+        start_index = self._map.get_index(start)
+        for index, index_mv_pts in mv_pts.items():
+            if index == start_index:
+                result.set_point(start, index_mv_pts, None)
+            else:
+                result.set_point(self._map.get_point_at_index(index), index_mv_pts, DIRECTIONS[last_steps[index]])
+        return result
 
     def get_movement_points(self, start: Point, max_mv: int) -> Dict[Point, int]:
         """
+        heap-based search. each point is settled once, in order of mv_pts.
 
         {Point: mv_pts_from_start}
         """
-        edges = {start}
-        start_movement_values = {start: 0}
-        max_val = max_mv
-
-        raw_movement_values = self._create_raw_movement_values(edges, max_val, start_movement_values)
-
-        return _remove_values_above_cutoff(raw_movement_values, max_val)
-
-    def _create_raw_movement_values(self, edges_to_investigate, max_val, movement_values):
-        new_movement_values = movement_values.copy()
-        while _any_edge_values_le_max(edges_to_investigate, new_movement_values, max_val):
-            temp_edges = set()
-            for edge in edges_to_investigate:
-                new_movement_values, new_edges = self._get_updated_mv_values_and_new_edges(edge, max_val,
-                                                                                           new_movement_values)
-                temp_edges.update(new_edges)
-            edges_to_investigate = temp_edges.copy()
-        return new_movement_values
-
-    def _get_updated_mv_values_and_new_edges(self, edge, max_val, move_values):
-        new_edges = set()
-        updated_mv_values = move_values.copy()
-        base_move_value = updated_mv_values[edge]
-        if base_move_value < max_val:
-            for direction in Direction:
-
-                if isinstance(max_val, tuple):
-                    new_edge, new_move_val = self._get_candidate_with_path(base_move_value, edge, direction)
-                else:
-                    new_edge, new_move_val = self._get_candidate_without_path(base_move_value, edge, direction)
-
-                if new_edge not in updated_mv_values or new_move_val < updated_mv_values[new_edge]:
-                    new_edges.add(new_edge)
-                    updated_mv_values[new_edge] = new_move_val
-
-        return updated_mv_values, new_edges
-
-    def _get_candidate_with_path(self, base_move_value, edge, direction):
-        candidate_edge = edge.in_direction(direction)
-        move_pts = self._get_mv_pts(edge, candidate_edge) + base_move_value[0]
-        path = base_move_value[1][:]
-        path.append(direction)
-        candidate_move_value = (move_pts, path)
-        return candidate_edge, candidate_move_value
-
-    def _get_candidate_without_path(self, base_move_value, edge, direction):
-        candidate_edge = edge.in_direction(direction)
-        candidate_move_value = self._get_mv_pts(edge, candidate_edge) + base_move_value
-        return candidate_edge, candidate_move_value
-
-    def _get_mv_pts(self, start, finish):
-        if self._map.can_place_unit(finish):
-            return self._map.get_tile(start).move_pts(self._map.get_tile(finish))
-        else:
+        mv_pts, _ = self._search(start, max_mv, with_paths=False)
+        start_index = self._map.get_index(start)
+        return {start if index == start_index else self._map.get_point_at_index(index): index_mv_pts
+                for index, index_mv_pts in mv_pts.items()}
+
+    def _search(self, start: Point, max_mv: int, with_paths: bool) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+        works on map indices. step costs come from `Map.get_edge_costs` and occupied points are skipped.
+
+        :return: ({index: mv_pts}, {index: index in DIRECTIONS of the last step})
+        """
+        start_index = self._map.get_index(start)
+        if max_mv < 0 or start_index is None:
+            return ({start_index: 0} if max_mv >= 0 else {}), {}
+
+        edge_costs = self._map.get_edge_costs()
+        offsets = self._map.get_index_offsets()
+        has_unit_at_index = self._map.has_unit_at_index
+
+        mv_pts = {start_index: 0}
+        last_steps = {}
+        path_keys = {start_index: (0, 0)}
+        settled = set()
+        queue = [(0, start_index)]
+        while queue:
+            current_mv_pts, index = heappop(queue)
+            if current_mv_pts > max_mv:
+                break
+            if index in settled:
+                continue
+            settled.add(index)
+            if with_paths:
+                depth, code = path_keys[index]
+            for direction_index in range(4):
+                step = edge_costs[index * 4 + direction_index]
+                if step == NO_EDGE:
+                    continue
+                neighbour = index + offsets[direction_index]
+                if neighbour in settled or has_unit_at_index(neighbour):
+                    continue
+                new_mv_pts = current_mv_pts + step
+                if new_mv_pts > max_mv:
+                    continue
+                old_mv_pts = mv_pts.get(neighbour)
+                if old_mv_pts is None or new_mv_pts < old_mv_pts:
+                    mv_pts[neighbour] = new_mv_pts
+                    last_steps[neighbour] = direction_index
+                    if with_paths:
+                        path_keys[neighbour] = (depth + 1, code * 4 + _DIRECTION_RANKS[direction_index])
+                    heappush(queue, (new_mv_pts, neighbour))
+                elif with_paths and new_mv_pts == old_mv_pts:
+                    path_key = (depth + 1, code * 4 + _DIRECTION_RANKS[direction_index])
+                    if _sorts_before(path_key, path_keys[neighbour]):
+                        last_steps[neighbour] = direction_index
+                        path_keys[neighbour] = path_key
+        return mv_pts, last_steps
+
+
+class MovementPaths(object):
+    """
+    result of `MovementCalculator.get_movement_paths`. stores mv_pts and the last step of the path for each point.
+    paths are rebuilt on demand by walking back to the start.
+    """
+    def __init__(self, start: Point):
+        self._start = start
+        self._mv_pts = {}  # type: Dict[Point, int]
+        self._last_steps = {}  # type: Dict[Point, Direction]
+
+    @property
+    def start(self):
+        return self._start
+
+    def __contains__(self, point: Point):
+        return point in self._mv_pts
+
+    def __len__(self):
+        return len(self._mv_pts)
+
+    def set_point(self, point: Point, mv_pts: int, last_step: Union[Direction, None]):
+        self._mv_pts[point] = mv_pts
+        if last_step is not None:
+            self._last_steps[point] = last_step
+
+    def get_mv_pts(self, point: Point) -> Union[int, None]:
+        return self._mv_pts.get(point)
+
+    def get_movement_points(self) -> Dict[Point, int]:
+        """{Point: mv_pts_from_start}"""
+        return self._mv_pts.copy()
+
+    def points(self) -> List[Point]:
+        return list(self._mv_pts)
+
+    def path_to(self, point: Point) -> List[Direction]:
+        if point not in self._mv_pts:
+            raise ValueError('{} is not reachable from {}'.format(point, self._start))
+        path = []
+        current = point
+        while current != self._start:
+            direction = self._last_steps[current]
+            path.append(direction)
+            current = current.in_direction(direction.opposite())
+        path.reverse()
+        return path
+
+    def to_dict(self) -> PtsToMvAndPath:
+        """{Point: (mv_pts_from_start, [path_from_start])}"""
+        return {point: (mv_pts, self.path_to(point)) for point, mv_pts in self._mv_pts.items()}
+
+
+class DistanceField(object):
+    """
+    result of `MovementCalculator.get_distance_field`. mv_pts from each point on the map to the goal, ignoring units.
+    """
+    def __init__(self, map_: Map, goal: Point, distances: array):
+        self._map = map_
+        self._goal = goal
+        self._distances = distances
+
+    @property
+    def goal(self):
+        return self._goal
+
+    def get_distance(self, point: Point) -> Union[int, float]:
+        """float('inf') if the goal can't be reached from point"""
+        index = self._map.get_index(point)
+        if index is None or self._distances[index] == NO_DISTANCE:
             return float('inf')
+        return self._distances[index]
+
+    def get_next_step(self, point: Point) -> Union[Direction, None]:
+        """first step of a shortest path to the goal. None at the goal or if it can't be reached."""
+        index = self._map.get_index(point)
+        if index is None or self._distances[index] in (0, NO_DISTANCE):
+            return None
+        edge_costs = self._map.get_edge_costs()
+        offsets = self._map.get_index_offsets()
+        for direction in sorted(DIRECTIONS):
+            direction_index = DIRECTIONS.index(direction)
+            step = edge_costs[index * 4 + direction_index]
+            if step == NO_EDGE:
+                continue
+            neighbour_distance = self._distances[index + offsets[direction_index]]
+            if neighbour_distance != NO_DISTANCE and neighbour_distance + step == self._distances[index]:
+                return direction
+        return None
+
+    def get_path(self, point: Point) -> List[Direction]:
+        """a shortest path from point to the goal, for `Point.generate_path`. empty if the goal can't be reached."""
+        path = []
+        direction = self.get_next_step(point)
+        while direction is not None:
+            path.append(direction)
+            point = point.in_direction(direction)
+            direction = self.get_next_step(point)
+        return path
+
+
+_DIRECTION_RANKS = tuple(sorted(DIRECTIONS).index(direction) for direction in DIRECTIONS)
+
+
+def _sorts_before(path_key: Tuple[int, int], other_key: Tuple[int, int]) -> bool:
+    """
+    a path's key is (steps, code), where code reads the ranks of its steps as a base-4 number. padding the shorter
+    code with zeros to the same number of steps lines the paths up step by step, so comparing the codes compares the
+    paths. they can't tie: every step costs at least 1, so a path can't be a prefix of another with the same mv_pts.
+    """
+    steps, code = path_key
+    other_steps, other_code = other_key
+    if steps < other_steps:
+        return code * 4 ** (other_steps - steps) < other_code
+    return code < other_code * 4 ** (steps - other_steps)
+
+
+def _rebuild_path(index: int, start: int, last_steps: Dict[int, int], offsets: Tuple[int, ...]) -> List[Direction]:
+    path = []
+    while index != start:
+        direction_index = last_steps[index]
+        path.append(DIRECTIONS[direction_index])
+        index -= offsets[direction_index]
+    path.reverse()
+    return path
+
+
+_worker_calculator = None  # type: MovementCalculator
 
 
-def _any_edge_values_le_max(edges, move_values, max_value):
-    return any(move_values[edge] <= max_value for edge in edges)
+def _set_worker_calculator(map_: Map):
+    global _worker_calculator
+    _worker_calculator = MovementCalculator(map_)
 
 
-def _remove_values_above_cutoff(dictionary, cutoff):
-    return {point: mv_value for point, mv_value in dictionary.items() if mv_value <= cutoff}
+def _get_worker_movement_paths(searches: List[Tuple[Point, int]]) -> List[MovementPaths]:
+    return [_worker_calculator.get_movement_paths(point, max_mv) for point, max_mv in searches]
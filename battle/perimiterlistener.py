@@ -1,4 +1,6 @@
-from battle.maptools.map import Map
+from typing import Dict, Set
+
+from battle.maptools.map import Map, MapEvent
 from battle.maptools.point import Point
 from battle.players.units import Soldier
 from battle.rangefinder import RangeFinder
@@ -11,13 +13,53 @@ class PerimeterListener(object):
         self._range_finder = RangeFinder(self._map)
         map_pts = Point(0, 0).to_rectangle(*self._map.get_size())
         self._watchers_at_point = {pt: set() for pt in map_pts}
+        self._watched_points = {}  # type: Dict[Soldier, Set[Point]]
+        self._origins = {}  # type: Dict[Soldier, Set[Point]]
+        self._map.subscribe(self._on_map_change)
+
+    def __setstate__(self, state):
+        """a map leaves its subscribers behind when it is copied, so subscribe again to the copy."""
+        self.__dict__.update(state)
+        self._map.subscribe(self._on_map_change)
+
+    def _on_map_change(self, event: MapEvent, point: Point, _):
+        """a changed tile can change what any unit close enough to one of its origins watches."""
+        if event is not MapEvent.TILE_CHANGED:
+            return None
+        to_refresh = [unit for unit, origins in self._origins.items()
+                      if any(abs(origin.x - point.x) + abs(origin.y - point.y) <= unit.get_perimeter_size()
+                             for origin in origins)]
+        for unit in to_refresh:
+            new_watched = set()
+            for origin in self._origins[unit]:
+                new_watched.update(self._get_watched_points(unit, origin))
+            self._replace_watched_points(unit, new_watched)
 
     def set_perimeter(self, unit: Soldier, point: Point):
+        """add the perimeter at point to whatever the unit already watches."""
+        watched = self._get_watched_points(unit, point)
+        for pt in watched:
+            self._watchers_at_point[pt].add(unit)
+        self._watched_points.setdefault(unit, set()).update(watched)
+        self._origins.setdefault(unit, set()).add(point)
+
+    def move_perimeter(self, unit: Soldier, new_point: Point):
+        """replace the unit's perimeter with the one at new_point, touching only points that change."""
+        self._replace_watched_points(unit, self._get_watched_points(unit, new_point))
+        self._origins[unit] = {new_point}
+
+    def _replace_watched_points(self, unit: Soldier, new_watched: Set[Point]):
+        old_watched = self._watched_points.get(unit, set())
+        for pt in old_watched - new_watched:
+            self._watchers_at_point[pt].discard(unit)
+        for pt in new_watched - old_watched:
+            self._watchers_at_point[pt].add(unit)
+        self._watched_points[unit] = new_watched
+
+    def _get_watched_points(self, unit: Soldier, point: Point) -> Set[Point]:
         range_dict = self._get_range_dict(unit, point)
         del range_dict[0]
-        for pt_advantage_list in range_dict.values():
-            for pair in pt_advantage_list:
-                self._watchers_at_point[pair[0]].add(unit)
+        return {pair[0] for pt_advantage_list in range_dict.values() for pair in pt_advantage_list}
 
     def _get_range_dict(self, unit, point):
         max_range = unit.get_perimeter_size()
@@ -28,8 +70,12 @@ class PerimeterListener(object):
         return range_dict
 
     def rm_perimeter(self, unit: Soldier):
-        for units in self._watchers_at_point.values():
-            units.discard(unit)
+        self._origins.pop(unit, None)
+        for pt in self._watched_points.pop(unit, ()):
+            self._watchers_at_point[pt].discard(unit)
+
+    def get_watched_points(self, unit: Soldier) -> Set[Point]:
+        return self._watched_points.get(unit, set()).copy()
 
     def get_attackers(self, point: Point) -> set:
         return self._watchers_at_point[point].copy()
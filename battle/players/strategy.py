@@ -14,10 +14,12 @@ class Strategy(object):
 
 
 class StupidStrategy(Strategy):
-    def __init__(self):
+    def __init__(self, rng: random.Random = None):
+        """:param rng: shuffles the actions. each strategy gets its own unseeded Random if not given."""
         super(StupidStrategy, self).__init__()
+        self._rng = rng if rng is not None else random.Random()
 
     def get_action(self, ally, enemy):
         actions = Action.to_list()
-        random.shuffle(actions)
+        self._rng.shuffle(actions)
         return actions
@@ -1,7 +1,17 @@
-from battle.maptools.point import Point
+from typing import Dict, List, Tuple, Union
+from weakref import WeakKeyDictionary
+
+from battle.maptools.point import Point, get_ring_offsets
 from battle.maptools.map import Map
 from battle.players.units import Soldier, Base
 
+_unit_teams = WeakKeyDictionary()  # type: Dict[Soldier, Team]
+
+
+def get_team_of(unit: Soldier) -> Union['Team', None]:
+    """the team that unit is on. None if it is on no team."""
+    return _unit_teams.get(unit)
+
 
 class Team(object):
     """
@@ -9,12 +19,14 @@ class Team(object):
     creates errors.
     """
     def __init__(self, home: Point, map_: Map):
-        self._placed_units = []
-        self._unplaced_units = []
+        self._placed_units = {}  # type: Dict[Soldier, None]
+        self._unplaced_units = {}  # type: Dict[Soldier, None]
         self._map = map_
         self._home = home
         self._base = Base()
         self._map.place_unit(self._base, self._home)
+        self._spawn_cursor = (1, 0)
+        self._spawn_versions = None  # type: Tuple[int, int]
 
     @property
     def home(self):
@@ -26,45 +38,90 @@ class Team(object):
 
     @property
     def deployed(self):
-        return self._placed_units[:]
+        return list(self._placed_units)
 
     @property
     def undeployed(self):
-        return self._unplaced_units[:]
+        return list(self._unplaced_units)
 
     def add_player(self, player: Soldier):
-        if not self.is_on_team(player):
-            self._unplaced_units.append(player)
+        """a unit can only be on one team. ValueError if it is on another."""
+        if self.is_on_team(player):
+            return None
+        if get_team_of(player) is not None:
+            raise ValueError('Player is on another team')
+        self._unplaced_units[player] = None
+        _unit_teams[player] = self
 
     def unteam_player(self, player: Soldier):
         if player in self._placed_units:
-            index = self._placed_units.index(player)
-            del self._placed_units[index]
+            del self._placed_units[player]
         elif player in self._unplaced_units:
-            index = self._unplaced_units.index(player)
-            del self._unplaced_units[index]
+            del self._unplaced_units[player]
         else:
             raise ValueError('Player is not on the team')
+        del _unit_teams[player]
 
     def is_on_team(self, player: Soldier):
-        return player in self.deployed + self.undeployed
+        return player in self._placed_units or player in self._unplaced_units
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for unit in list(self._placed_units) + list(self._unplaced_units):
+            _unit_teams[unit] = self
 
     def spawn(self):
         """
             WARNING:   You must use `spawn()` to place a unit from a team. Using both  `Map.place_unit` and `spawn`
             creates errors.
+
+            the unit goes on the first free point of the nearest ring around home. if the map has not changed since
+            the last spawn, the search carries on from the point after that spawn instead of starting again.
             """
         if not self._unplaced_units:
             raise ValueError('No unplaced units!')
-        unit = self._unplaced_units.pop(0)
-        max_distance = sum(self._map.get_size())
-        current_distance = 1
-        while current_distance <= max_distance:
-            candidates = self.home.at_distance(current_distance)
-            for candidate in candidates:
+        return self._spawn_units([next(iter(self._unplaced_units))])[0]
+
+    def spawn_all(self) -> List[Tuple[Soldier, Point]]:
+        """
+        spawn every undeployed unit, in the same places as calling `spawn()` for each, with one sweep of the rings
+        around home. if the map fills up, the units that were placed stay placed and ValueError is raised.
+
+        :return: [(unit, point), ...] in spawn order
+        """
+        return self._spawn_units(list(self._unplaced_units))
+
+    def _spawn_units(self, units: List[Soldier]) -> List[Tuple[Soldier, Point]]:
+        """place units in order on the free points of the rings around home, starting from the spawn cursor."""
+        if self._spawn_versions != (self._map.get_terrain_version(), self._map.get_unit_version()):
+            self._spawn_cursor = (1, 0)
+        distance, start = self._spawn_cursor
+        home_x = self._home.x
+        home_y = self._home.y
+        width, height = self._map.get_size()
+        max_distance = width + height
+        spawned = []
+        while distance <= max_distance and len(spawned) < len(units):
+            offsets = get_ring_offsets(distance)
+            for position in range(start, len(offsets)):
+                x = home_x + offsets[position][0]
+                y = home_y + offsets[position][1]
+                if not self._map.contains_xy(x, y):
+                    continue
+                candidate = self._map.get_point_at_index(y * width + x)
                 if self._map.can_place_unit(candidate):
+                    unit = units[len(spawned)]
                     self._map.place_unit(unit, candidate)
-                    self._placed_units.append(unit)
-                    return unit, candidate
-            current_distance += 1
-        raise ValueError('No space for you!')
+                    del self._unplaced_units[unit]
+                    self._placed_units[unit] = None
+                    spawned.append((unit, candidate))
+                    self._spawn_cursor = (distance, position + 1)
+                    self._spawn_versions = (self._map.get_terrain_version(), self._map.get_unit_version())
+                    if len(spawned) == len(units):
+                        break
+            else:
+                distance += 1
+                start = 0
+        if len(spawned) < len(units):
+            raise ValueError('No space for you!')
+        return spawned
@@ -1,26 +1,53 @@
+from collections import OrderedDict
 from typing import Dict, List, Tuple
 
 from battle.lineofsight import LineOfSight
-from battle.maptools.map import Map
+from battle.maptools.map import Map, MapEvent
 from battle.maptools.point import Point
 from battle.players.units import Soldier
 
 
+SIGHT_RANGES_KEPT = 256
+
 class RangeFinder(object):
-    def __init__(self, map_: Map):
+    def __init__(self, map_: Map, sight_ranges_kept: int = SIGHT_RANGES_KEPT):
+        """
+        :param sight_ranges_kept: how many of the most recently used sight ranges are kept.
+        """
         self._map = map_
         self._sighter = LineOfSight(map_)
+        self._sight_ranges = OrderedDict()  # type: Dict[Tuple[Point, int], Dict[int, List[Point]]]
+        self._sight_ranges_kept = sight_ranges_kept
+        self._map.subscribe(self._on_map_change)
+
+    def __setstate__(self, state):
+        """a map leaves its subscribers behind when it is copied, so subscribe again to the copy."""
+        self.__dict__.update(state)
+        self._map.subscribe(self._on_map_change)
+
+    def _on_map_change(self, event: MapEvent, point: Point, _):
+        """sight ranges only depend on tiles. drop the ones that could reach the changed tile."""
+        if event is not MapEvent.TILE_CHANGED:
+            return None
+        stale = [key for key in self._sight_ranges
+                 if abs(key[0].x - point.x) + abs(key[0].y - point.y) <= key[1]]
+        for key in stale:
+            del self._sight_ranges[key]
+
+    def clear_sight_ranges(self):
+        self._sight_ranges = OrderedDict()
 
     def get_all_usable_points_units_only(self, origin: Point, max_distance: int) -> Dict[int, List[Point]]:
         distances_to_points = {key: [] for key in range(max_distance+1)}
         largest_map_distance = sum(self._map.get_size())
 
-        stop_checking_map = min(largest_map_distance, max_distance) + 1
+        stop_checking_map = min(largest_map_distance, max_distance)
 
-        for distance in range(stop_checking_map):
-            on_map_pts = [point for point in origin.at_distance(distance)
-                          if self._map.has_unit(point)]
-            distances_to_points[distance] = on_map_pts
+        for point in self._map.get_unit_points_near(origin, stop_checking_map):
+            distance = abs(point.x - origin.x) + abs(point.y - origin.y)
+            distances_to_points[distance].append(point)
+        for points in distances_to_points.values():
+            points.sort()
         return distances_to_points
 
     def get_all_usable_points(self, origin: Point, max_distance: int) -> Dict[int, List[Point]]:
@@ -29,9 +56,10 @@ class RangeFinder(object):
 
         stop_checking_map = min(largest_map_distance, max_distance) + 1
 
+        point_cache = self._map.get_point_cache()
         for distance in range(stop_checking_map):
-            on_map_pts = [point for point in origin.at_distance(distance)
-                          if self._map.is_on_map(point) and self._map.has_tile(point)]
+            on_map_pts = [point for point in origin.at_distance(distance, point_cache)
+                          if self._map.has_tile(point)]
             distances_to_points[distance] = on_map_pts
         return distances_to_points
 
@@ -44,14 +72,31 @@ class RangeFinder(object):
         return distances_to_units
 
     def get_sight_ranges(self, origin: Point, max_distance: int) -> dict:
-        points = self.get_all_usable_points(origin, max_distance)
-        return {key: [point for point in val if self._sighter.can_sight_target(point, origin)]
-                for key, val in points.items()}
+        """
+        the most recently used sight ranges are kept until a tile within max_distance of origin changes.
+
+        the answer is shared with the cache and with every other caller asking for it. do not change it; copy it first.
+        """
+        key = (origin, max_distance)
+        sight_ranges = self._sight_ranges.get(key)
+        if sight_ranges is None:
+            points = self.get_all_usable_points(origin, max_distance)
+            sight_ranges = self._sight_ranges[key] = self._filter_by_sight(origin, points)
+            if len(self._sight_ranges) > self._sight_ranges_kept:
+                self._sight_ranges.popitem(last=False)
+        else:
+            self._sight_ranges.move_to_end(key)
+        return sight_ranges
 
     def get_sight_ranges_units_only(self, origin: Point, max_distance: int) -> dict:
         points = self.get_all_usable_points_units_only(origin, max_distance)
-        return {key: [point for point in val if self._sighter.can_sight_target(point, origin)]
-                for key, val in points.items()}
+        return self._filter_by_sight(origin, points)
+
+    def _filter_by_sight(self, origin: Point, distances_to_points: Dict[int, List[Point]]) -> Dict[int, List[Point]]:
+        all_points = [point for points in distances_to_points.values() for point in points]
+        sighted = set(self._sighter.get_sighted_targets(origin, all_points))
+        return {key: [point for point in val if point in sighted]
+                for key, val in distances_to_points.items()}
 
     def get_attack_ranges_ranged(self, origin: Point, range_: int) -> dict:
         distance_point_dict = self.get_sight_ranges(origin, range_)
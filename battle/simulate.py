@@ -0,0 +1,144 @@
+"""
+headless battles for evaluating strategies. `python -m battle.simulate --battles 1000 --processes 4` prints one compact
+json result per battle. battle i always uses seed `seed + i`, so a batch gives the same results however it is split
+across processes.
+"""
+import argparse
+import json
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from battle.maptools.map import Map
+from battle.maptools.mapfile import load_map
+from battle.maptools.point import Point
+from battle.maptools.tile import Tile, ImpassableTile
+from battle.players.strategy import StupidStrategy
+from battle.players.team import Team
+from battle.players.units import Soldier
+from battle.turn_execution.turn_coordinator import TurnCoordinator
+from battle.weapon import MeleeWeapon, RangedWeapon
+
+
+class BattleConfig(object):
+    def __init__(self, width: int = 20, height: int = 20, units_per_team: int = 5, ranged_per_team: int = 2,
+                 max_turns: int = 100, max_elevation: int = 3, impassable_pct: float = 5.0, map_file: str = None):
+        """
+        :param map_file: a file from `mapfile.save_map` to fight every battle on. it is memory-mapped, not rebuilt,
+            and its size is used instead of width and height. its corners must be passable.
+        """
+        if width < 2 or height < 2:
+            raise ValueError('map must be at least 2x2')
+        if ranged_per_team > units_per_team:
+            raise ValueError('ranged_per_team can\'t be more than units_per_team')
+        self.width = width
+        self.height = height
+        self.units_per_team = units_per_team
+        self.ranged_per_team = ranged_per_team
+        self.max_turns = max_turns
+        self.max_elevation = max_elevation
+        self.impassable_pct = impassable_pct
+        self.map_file = map_file
+
+    @classmethod
+    def from_dict(cls, config: dict) -> 'BattleConfig':
+        return cls(**config)
+
+    def to_dict(self) -> dict:
+        return self.__dict__.copy()
+
+    def get_homes(self) -> List[Point]:
+        return get_homes(self.width, self.height)
+
+
+def get_homes(width: int, height: int) -> List[Point]:
+    return [Point(0, 0), Point(width - 1, height - 1)]
+
+
+def build_map(config: BattleConfig, rng: random.Random) -> Map:
+    homes = config.get_homes()
+    tiles = []
+    for point in Point(0, 0).to_rectangle(config.width, config.height):
+        if point not in homes and rng.random() * 100 < config.impassable_pct:
+            tiles.append(ImpassableTile(point=point))
+        else:
+            tiles.append(Tile(elevation=rng.randint(0, config.max_elevation), point=point))
+    return Map(config.width, config.height, tiles)
+
+
+def build_team(config: BattleConfig, home: Point, map_: Map, rng: random.Random) -> Team:
+    team = Team(home, map_)
+    for index in range(config.units_per_team):
+        soldier = Soldier(strategy=StupidStrategy(rng))
+        if index < config.ranged_per_team:
+            soldier.equip_weapon(RangedWeapon(dmg=5, action_pts=2, range_=5, ammo=10))
+        else:
+            soldier.equip_weapon(MeleeWeapon(dmg=10, action_pts=1))
+        team.add_player(soldier)
+    return team
+
+
+def run_battle(config: BattleConfig, seed: int) -> dict:
+    """
+    everything random in the battle comes from one Random(seed), so a result can be replayed on its own.
+
+    :return: {'seed': seed, 'winner': 1 | 2 | 0 for no winner, 'turns': turns_played, 'left': [team_1, team_2]}
+    """
+    rng = random.Random(seed)
+    if config.map_file:
+        map_ = load_map(config.map_file)
+    else:
+        map_ = build_map(config, rng)
+    team_1, team_2 = [build_team(config, home, map_, rng) for home in get_homes(*map_.get_size())]
+    coordinator = TurnCoordinator(map_, team_1, team_2, rng)
+    winner = coordinator.play_battle(config.max_turns)
+    return {
+        'seed': seed,
+        'winner': {team_1: 1, team_2: 2}.get(winner, 0),
+        'turns': coordinator.get_turns(),
+        'left': [len(team_1.deployed), len(team_2.deployed)],
+    }
+
+
+def run_battles(config: BattleConfig, battles: int, seed: int = 0, processes: int = None) -> List[dict]:
+    """results are in seed order. with processes, battles are shared out across a pool of that many processes."""
+    seeds = list(range(seed, seed + battles))
+    if not processes or processes < 2:
+        return [run_battle(config, battle_seed) for battle_seed in seeds]
+    chunksize = max(1, battles // (processes * 4))
+    with ProcessPoolExecutor(processes, initializer=_set_worker_config, initargs=(config,)) as executor:
+        return list(executor.map(_run_worker_battle, seeds, chunksize=chunksize))
+
+
+_worker_config = None  # type: BattleConfig
+
+
+def _set_worker_config(config: BattleConfig):
+    global _worker_config
+    _worker_config = config
+
+
+def _run_worker_battle(seed: int) -> dict:
+    return run_battle(_worker_config, seed)
+
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(prog='python -m battle.simulate', description='run headless battles')
+    parser.add_argument('--config', help='json file of BattleConfig arguments')
+    parser.add_argument('--battles', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first battle')
+    parser.add_argument('--processes', type=int, default=None)
+    options = parser.parse_args(args)
+
+    config = BattleConfig()
+    if options.config:
+        with open(options.config) as config_file:
+            config = BattleConfig.from_dict(json.load(config_file))
+
+    for result in run_battles(config, options.battles, options.seed, options.processes):
+        sys.stdout.write(json.dumps(result, separators=(',', ':')) + '\n')
+
+
+if __name__ == '__main__':
+    main()
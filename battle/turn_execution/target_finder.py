@@ -1,6 +1,6 @@
 from typing import List
 
-from battle.players.team import Team
+from battle.players.team import Team, get_team_of
 from battle.players.units import Soldier
 from battle.maptools.map import Map
 from battle.rangefinder import RangeFinder
@@ -13,9 +13,11 @@ class TargetFinder(object):
         self._rf = RangeFinder(self._map)
 
     def get_team(self, unit: Soldier):
-        for team in self._teams:
-            if team.is_on_team(unit):
-                return team
+        """None if the unit is not on one of this finder's teams"""
+        team = get_team_of(unit)
+        if team in self._teams:
+            return team
+        return None
 
     def allies_in_sight(self, unit: Soldier):
         """
@@ -1,8 +1,11 @@
 import random
+from typing import Dict, List, Tuple, Union
 
 from battle.maptools.vector import DangerOpportunity
 from battle.maptools.footprint import FootPrint, FootPrintPackage, Token
 from battle.maptools.map import Map
+from battle.maptools.point import Point
+from battle.players.action import Action
 from battle.players.team import Team
 from battle.players.units import Soldier
 from battle.perimiterlistener import PerimeterListener
@@ -12,117 +15,111 @@ from battle.turn_execution.target_finder import TargetFinder
 
 
 class Actionator(object):
-    def __init__(self, unit: Soldier, action, perimeter_listener: PerimeterListener, map_: Map, teams: list):
-        self._unit = unit
-        self._action = action
-        self._pl = perimeter_listener
+    def __init__(self, map_: Map, perimeter_listener: PerimeterListener, teams: List[Team]):
+        """carries out GO and ATTACK for units on the two teams."""
         self._map = map_
-        self._mc = MovementCalculator(self._map)
+        self._pl = perimeter_listener
         self._teams = teams[:]
-
-    def _get_targets_in_range(self):
-        tf = TargetFinder(self._map, self._teams)
-        return tf.enemies_in_range(self._unit)
-
-    def _get_targets_in_sight(self):
-        tf = TargetFinder(self._map, self._teams)
-        return tf.enemies_in_sight(self._unit)
-
-    def move(self):
+        self._mc = MovementCalculator(self._map)
+        self._tf = TargetFinder(self._map, self._teams)
+
+    def get_ally_enemy(self, unit: Soldier) -> Tuple[Team, Team]:
+        team_1, team_2 = self._teams
+        if team_1.is_on_team(unit):
+            return team_1, team_2
+        return team_2, team_1
+
+    def take_turn(self, unit: Soldier, actions: List[Action]):
+        """do GO and ATTACK in the order given, stopping at STAY."""
+        for action in actions:
+            if action is Action.STAY:
+                return None
+            if action is Action.GO:
+                self.move(unit)
+            elif action is Action.ATTACK:
+                self.attack(unit)
+
+    def move(self, unit: Soldier) -> Point:
         """
-                        get location
-                        get path  list of points
-                            sigh range, enemy ally
-                            attack range, enemy
-
-
-                        for point in path:
-                            check pl
-                        jump to destination
-                        set pl
-
-                        pseudo-code
-                        """
-
-    def attack(self):
-        pass
-
-    def get_target(self):
-        self._get_targets_in_range()
-        self._get_targets_in_sight()
-
-    def get_path(self):
-        max_mv = self._get_max_mv()
-        self._mc.get_movement_points_with_path(self._map.get_point(self._unit), max_mv)
-
-    def _get_max_mv(self):
-        return self._unit.get_action_points()
-
-
-    """
-    hw - type out in pseudo-code, how you will decide where someone moves and how far?
-    actions:
-    NULL
-
-    GO
-    STAY
-    ATTACK
-
-    ENEMY
-    ALLY
-
-    NEAREST
-    FURTHEST
-
-    STRONGEST
-    WEAKEST
-
-    HIGHEST
-    LOWEST
-
-    HEALTH
-    WEAPON
-    CONCENTRATION
-
-    OPPORTUNITY
-    DANGER
-
-    TOWARDS
-    AWAY
-
-
-
-    """
-
-
-
-
-
-
-
+        move toward the nearest enemy as far as action points allow. the move stops early on the first point that an
+        enemy perimeter covers. returns where the unit ends up.
+        """
+        start = self._map.get_point(unit)
+        _, enemy = self.get_ally_enemy(unit)
+        enemy_points = [self._map.get_point(enemy_unit) for enemy_unit in enemy.deployed]
+        if not enemy_points:
+            return start
+        paths = self._mc.get_movement_paths(start, unit.get_action_points())
+        destination = min(paths.points(),
+                          key=lambda point: (_get_closest_distance(point, enemy_points), paths.get_mv_pts(point), point))
+        finish = start
+        for point in start.generate_path(paths.path_to(destination)):
+            finish = point
+            if self._is_watched_by_enemy(point, enemy):
+                break
+        if finish != start:
+            self._map.remove_unit(start)
+            self._map.place_unit(unit, finish)
+            unit.move(paths.get_mv_pts(finish))
+            self._pl.move_perimeter(unit, finish)
+        return finish
+
+    def attack(self, unit: Soldier) -> List[Soldier]:
+        """
+        spend action points attacking the closest, then weakest, enemy in range until the unit runs out of action
+        points or targets. returns the targets in the order they were attacked.
+        """
+        attacked = []
+        while unit.can_act(unit.get_weapon().action_pts):
+            targets = self.get_enemies_in_range(unit)
+            if not targets:
+                break
+            target = min(targets, key=lambda enemy: (targets[enemy][0], enemy.get_health()))
+            unit.attack(target)
+            attacked.append(target)
+            if target.is_dead():
+                self._remove_dead(target)
+        return attacked
+
+    def get_enemies_in_range(self, unit: Soldier) -> Dict[Soldier, Tuple[int, int]]:
+        """{enemy: (distance, advantage)}. bases are not on a team, so they are never targets."""
+        _, enemy = self.get_ally_enemy(unit)
+        in_range = self._tf.units_in_range(unit)
+        return {other: value for other, value in in_range.items() if enemy.is_on_team(other)}
+
+    def _is_watched_by_enemy(self, point: Point, enemy: Team) -> bool:
+        return any(enemy.is_on_team(watcher) for watcher in self._pl.get_attackers(point))
+
+    def _remove_dead(self, unit: Soldier):
+        team, _ = self.get_ally_enemy(unit)
+        self._map.remove_unit(self._map.get_point(unit))
+        self._pl.rm_perimeter(unit)
+        team.unteam_player(unit)
 
 
 class TurnCoordinator(object):
-    def __init__(self, map_: Map, team_1: Team, team_2: Team):
+    def __init__(self, map_: Map, team_1: Team, team_2: Team, rng: random.Random = None):
+        """:param rng: sets the turn order. pass a seeded Random to replay a battle."""
         self._map = map_
+        self._rng = rng if rng is not None else random.Random()
         self._team_1 = team_1
         self._team_2 = team_2
         self._pm = PerimeterListener(self._map)
         self._mc = MovementCalculator(self._map)
         self._rf = RangeFinder(self._map)
+        self._actionator = Actionator(self._map, self._pm, [self._team_1, self._team_2])
 
         self._unmoved_units = []
+        self._turns = 0
 
     def get_ally_enemy(self, unit):
-        if self._team_1.is_on_team(unit):
-            return self._team_1, self._team_2
-        return self._team_2, self._team_1
+        return self._actionator.get_ally_enemy(unit)
 
     def create_turn_order(self):
         team_1_list = self._team_1.deployed
         team_2_list = self._team_2.deployed
         turn_order = team_1_list + team_2_list
-        random.shuffle(turn_order)
+        self._rng.shuffle(turn_order)
         self._unmoved_units = turn_order
 
     def get_action_list(self, unit: Soldier):
@@ -132,3 +129,49 @@ class TurnCoordinator(object):
         ally_vector = vectors.get(ally, DangerOpportunity.empty())
         enemy_vector = vectors.get(enemy, DangerOpportunity.empty())
         return unit.strategy.get_action(ally_vector, enemy_vector)
+
+    def deploy_all(self):
+        """spawn every undeployed unit on both teams and set their perimeters."""
+        for team in (self._team_1, self._team_2):
+            for unit, point in team.spawn_all():
+                self._pm.set_perimeter(unit, point)
+
+    def get_turns(self) -> int:
+        return self._turns
+
+    def is_over(self) -> bool:
+        return not self._team_1.deployed or not self._team_2.deployed
+
+    def get_winner(self) -> Union[Team, None]:
+        """None while both teams have units left, or if neither does."""
+        if self._team_1.deployed and not self._team_2.deployed:
+            return self._team_1
+        if self._team_2.deployed and not self._team_1.deployed:
+            return self._team_2
+        return None
+
+    def play_battle(self, max_turns: int) -> Union[Team, None]:
+        """deploy, then play turns until one team is wiped out or max_turns is reached. returns the winner."""
+        self.deploy_all()
+        while not self.is_over() and self._turns < max_turns:
+            self.play_turn()
+        return self.get_winner()
+
+    def play_turn(self):
+        """every deployed unit acts once in a random order, then every unit that is left rests."""
+        self.create_turn_order()
+        while self._unmoved_units and not self.is_over():
+            unit = self._unmoved_units.pop(0)
+            if not unit.is_dead():
+                self.take_turn(unit)
+        for unit in self._team_1.deployed + self._team_2.deployed:
+            unit.rest()
+        self._turns += 1
+
+    def take_turn(self, unit: Soldier):
+        """the Actionator does GO and ATTACK in the order the unit's strategy ranks them, stopping at STAY."""
+        self._actionator.take_turn(unit, self.get_action_list(unit))
+
+
+def _get_closest_distance(point: Point, others: List[Point]) -> int:
+    return min(abs(point.x - other.x) + abs(point.y - other.y) for other in others)
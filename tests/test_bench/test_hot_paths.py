@@ -0,0 +1,37 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from battle.bench.__main__ import main
+from battle.bench.hot_paths import BenchSetup, CASES, run_cases
+
+
+class TestHotPaths(unittest.TestCase):
+    def test_bench_setup(self):
+        setup = BenchSetup(10, 0.1)
+        self.assertEqual(setup.units, 11)
+        self.assertIs(setup.map.get_unit(setup.origin), setup.unit)
+
+    def test_every_case_runs_and_leaves_map_as_it_was(self):
+        setup = BenchSetup(10, 0.1)
+        for name, case in CASES.items():
+            case(setup)()
+            self.assertEqual(setup.team.deployed, [setup.unit], name)
+            self.assertEqual(setup.perimeter_listener.get_watched_points(setup.unit), set(), name)
+
+    def test_run_cases(self):
+        results = run_cases(10, 0.02, ['Team.spawn'], repeat=1, min_time=0.0)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['case'], 'Team.spawn')
+        self.assertEqual(results[0]['units'], 3)
+        self.assertGreater(results[0]['seconds'], 0)
+
+    def test_main(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            main(['--sizes', '10', '--densities', '0.02', '--cases', 'Team.spawn', '--repeat', '1',
+                  '--min-time', '0'])
+        report = json.loads(out.getvalue())
+        self.assertEqual([result['case'] for result in report['results']], ['Team.spawn'])
+        self.assertIn('python', report)
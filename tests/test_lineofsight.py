@@ -1,12 +1,25 @@
+import copy
 import unittest
 
-from battle.lineofsight import LineOfSight, get_slope, get_deltas_between
+from battle.lineofsight import LineOfSight, get_slope, get_deltas_between, is_any_on_sight_line
 from battle.maptools.tile import Tile
 from battle.maptools.map import Map
 from battle.maptools.point import Point
 
 
 class TestLineOfSight(unittest.TestCase):
+    def test_copy_is_told_about_changes_to_its_map(self):
+        map_ = Map(5, 1, [Tile() for _ in range(5)])
+        sighter = LineOfSight(map_)
+        sighter.precompute(4)
+        sighter_copy = copy.deepcopy(sighter)
+        sighter_copy.map.set_tile(Tile(point=Point(1, 0), elevation=10))
+        fresh = LineOfSight(sighter_copy.map)
+        self.assertFalse(fresh.can_sight_target(Point(4, 0), Point(0, 0)))
+        self.assertEqual(sighter_copy.can_sight_target(Point(4, 0), Point(0, 0)),
+                         fresh.can_sight_target(Point(4, 0), Point(0, 0)))
+        self.assertTrue(sighter.can_sight_target(Point(4, 0), Point(0, 0)))
+
     def test_get_slope_pos_inf(self):
         point_1 = Point(0, 0)
         point_2 = Point(0, 2)
@@ -405,5 +418,115 @@ class TestLineOfSight(unittest.TestCase):
         self.assertTrue(sighting_tool.can_sight_target(target, shooter_hit_2))
 
 
+    def test_precompute_matches_can_sight_target(self):
+        map_ = get_hilly_map()
+        live = LineOfSight(map_)
+        tabled = LineOfSight(map_)
+        tabled.precompute(3)
+        self.assertEqual(tabled.get_table_radius(), 3)
+        points = Point(0, 0).to_rectangle(5, 5)
+        for shooter in points:
+            for target in points:
+                self.assertEqual(tabled.can_sight_target(target, shooter), live.can_sight_target(target, shooter))
+
+    def test_precompute_with_processes_matches_precompute(self):
+        map_ = get_hilly_map()
+        single = LineOfSight(map_)
+        single.precompute(4)
+        pooled = LineOfSight(map_)
+        pooled.precompute(4, processes=2)
+        self.assertEqual(pooled._visible, single._visible)
+
+    def test_get_visible_targets(self):
+        elevations = {Point(0, 0): 0, Point(1, 0): 5, Point(2, 0): 0,
+                      Point(0, 1): 0, Point(1, 1): 0, Point(2, 1): 0}
+        tiles = [Tile(point=point, elevation=elevation) for point, elevation in elevations.items()]
+        sighting_tool = LineOfSight(Map(3, 2, tiles))
+        expected = {Point(0, 0), Point(1, 0), Point(0, 1), Point(1, 1)}
+        self.assertEqual(sighting_tool.get_visible_targets(Point(0, 0), 3), expected)
+
+    def test_precompute_table_drops_shooters_near_changed_tile(self):
+        map_ = get_hilly_map()
+        sighting_tool = LineOfSight(map_)
+        sighting_tool.precompute(2)
+        self.assertTrue(sighting_tool.can_sight_target(Point(0, 2), Point(0, 0)))
+
+        map_.set_tile(Tile(point=Point(0, 1), elevation=10))
+        self.assertFalse(sighting_tool.can_sight_target(Point(0, 2), Point(0, 0)))
+        self.assertEqual(sighting_tool.get_table_radius(), 2)
+        self.assertFalse(sighting_tool.is_in_table(Point(0, 0)))
+        self.assertFalse(sighting_tool.is_in_table(Point(1, 2)))
+        self.assertTrue(sighting_tool.is_in_table(Point(2, 2)))
+        self.assertTrue(sighting_tool.is_in_table(Point(4, 4)))
+
+    def test_precompute_table_matches_live_after_tile_changes(self):
+        map_ = get_hilly_map()
+        tabled = LineOfSight(map_)
+        tabled.precompute(3)
+        map_.set_tile(Tile(point=Point(2, 2), elevation=20))
+        map_.set_tile(Tile(point=Point(3, 0), elevation=-5))
+        live = LineOfSight(map_)
+        points = Point(0, 0).to_rectangle(5, 5)
+        for shooter in points:
+            for target in points:
+                self.assertEqual(tabled.can_sight_target(target, shooter), live.can_sight_target(target, shooter))
+
+    def test_clear_table(self):
+        sighting_tool = LineOfSight(get_hilly_map())
+        sighting_tool.precompute(2)
+        sighting_tool.clear_table()
+        self.assertEqual(sighting_tool.get_table_radius(), -1)
+        self.assertTrue(sighting_tool.can_sight_target(Point(0, 2), Point(0, 0)))
+
+    def test_get_sighted_targets_matches_can_sight_target(self):
+        map_ = get_hilly_map()
+        sighting_tool = LineOfSight(map_)
+        points = Point(0, 0).to_rectangle(5, 5)
+        for shooter in points:
+            expected = [target for target in points if sighting_tool.can_sight_target(target, shooter)]
+            self.assertEqual(sighting_tool.get_sighted_targets(shooter, points), expected)
+
+    def test_get_sighted_targets_keeps_order(self):
+        sighting_tool = LineOfSight(get_hilly_map())
+        targets = [Point(1, 0), Point(0, 0), Point(0, 1)]
+        self.assertEqual(sighting_tool.get_sighted_targets(Point(0, 0), targets), targets)
+
+    def test_get_sighted_targets_no_targets(self):
+        self.assertEqual(LineOfSight(get_hilly_map()).get_sighted_targets(Point(0, 0), []), [])
+
+    def test_get_sighted_targets_uses_table(self):
+        map_ = get_hilly_map()
+        sighting_tool = LineOfSight(map_)
+        sighting_tool.precompute(2)
+        points = Point(0, 0).to_rectangle(5, 5)
+        expected = [target for target in points if LineOfSight(map_).can_sight_target(target, Point(2, 2))]
+        self.assertEqual(sighting_tool.get_sighted_targets(Point(2, 2), points), expected)
+
+    def test_is_any_on_sight_line(self):
+        start = Point(0, 0)
+        finish = Point(4, 2)
+        self.assertTrue(is_any_on_sight_line([Point(1, 0)], start, finish))
+        self.assertTrue(is_any_on_sight_line([Point(1, 1)], start, finish))
+        self.assertTrue(is_any_on_sight_line([Point(5, 5), Point(2, 1)], start, finish))
+        self.assertFalse(is_any_on_sight_line([Point(0, 0), Point(4, 2), Point(2, 2), Point(-1, 0)], start, finish))
+
+    def test_is_any_on_sight_line_steep(self):
+        start = Point(0, 0)
+        finish = Point(1, -3)
+        self.assertTrue(is_any_on_sight_line([Point(0, -1)], start, finish))
+        self.assertTrue(is_any_on_sight_line([Point(1, -2)], start, finish))
+        self.assertFalse(is_any_on_sight_line([Point(2, -1), Point(1, -3), Point(0, 1), Point(0, -3)], start, finish))
+
+
+def get_hilly_map():
+    elevations = [[0, 1, 2, 1, 0],
+                  [0, 3, 0, 0, 1],
+                  [1, 0, 4, 0, 0],
+                  [0, 0, 0, 2, 0],
+                  [0, 2, 0, 0, 0]]
+    tiles = [Tile(point=Point(x, y), elevation=elevations[y][x]) for y in range(5) for x in range(5)]
+    return Map(5, 5, tiles)
+
+
 if __name__ == '__main__':
     unittest.main()
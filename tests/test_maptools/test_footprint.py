@@ -9,7 +9,7 @@ from battle.maptools.point import Point
 from battle.players.units import Soldier
 from battle.maptools.map import Map
 from battle.maptools.tile import Tile
-from battle.maptools.vector import Vector
+from battle.maptools.vector import Vector, sum_danger_opportunities
 
 
 N, S, E, W = Direction
@@ -79,12 +79,12 @@ class TestFootPrint(unittest.TestCase):
     def test_FootPrintPackage_default_init(self):
         fpp = FootPrintPackage()
         self.assertEqual(fpp.footprints, [])
-        self.assertEqual(fpp._stack.maxlen, 10)
+        self.assertEqual(fpp.max_size, 10)
 
     def test_FootPrintPackage_init(self):
         fpp = FootPrintPackage(11)
         self.assertEqual(fpp.footprints, [])
-        self.assertEqual(fpp._stack.maxlen, 11)
+        self.assertEqual(fpp.max_size, 11)
 
     def test_FootPrintPackage_push(self):
         fpp = FootPrintPackage()
@@ -160,3 +160,32 @@ class TestFootPrint(unittest.TestCase):
 
         self.assertEqual(team_2_answer.danger, Vector(0, 1))
         self.assertEqual(team_2_answer.opportunity, Vector(0, -1))
+
+    def test_team_vectors_after_footprints_pushed_out(self):
+        fpp = FootPrintPackage(3)
+        teams = cycle([self.team_1, self.team_2, self.team_1, self.team_3])
+        pushed = []
+        for token, direction, team in zip(list(Token) * 3, cycle(Direction), teams):
+            footprint = FootPrint(token, direction, team)
+            fpp.push(footprint)
+            pushed.insert(0, footprint)
+            kept = pushed[:3]
+            expected = {footprint.team: sum_danger_opportunities(other.vectorize() for other in kept
+                                                                 if other.team is footprint.team)
+                        for footprint in kept}
+            self.assertEqual(fpp.team_vectors(), expected)
+            self.assertEqual(fpp.footprints, pushed[:3])
+
+    def test_team_vectors_drops_team_with_no_footprints_left(self):
+        fpp = FootPrintPackage(2)
+        fpp.push(FootPrint(Token.NEUTRAL, N, self.team_1))
+        fpp.push(FootPrint(Token.DANGER, S, self.team_2))
+        fpp.push(FootPrint(Token.DANGER, E, self.team_2))
+        self.assertEqual(list(fpp.team_vectors()), [self.team_2])
+        self.assertEqual(fpp.team_vectors()[self.team_2].danger, Vector(1, -1))
+
+    def test_FootPrintPackage_max_size_zero(self):
+        fpp = FootPrintPackage(0)
+        fpp.push(FootPrint(Token.DANGER, S, self.team_2))
+        self.assertEqual(fpp.footprints, [])
+        self.assertEqual(fpp.team_vectors(), {})
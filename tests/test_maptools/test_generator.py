@@ -0,0 +1,53 @@
+import random
+import unittest
+
+from battle.maptools.generator import (generate_map, get_elevations, get_impassable, get_terrain_mvs,
+                                       get_value_noise)
+from battle.maptools.point import Point
+
+
+class TestGenerator(unittest.TestCase):
+    def test_generate_map_is_repeatable(self):
+        kwargs = dict(seed=3, impassable_clusters=4, terrain_regions=3)
+        map_1 = generate_map(30, 20, **kwargs)
+        map_2 = generate_map(30, 20, **kwargs)
+        self.assertEqual(map_1.get_size(), (30, 20))
+        self.assertEqual(map_1.get_edge_costs(), map_2.get_edge_costs())
+        self.assertNotEqual(map_1.get_edge_costs(), generate_map(30, 20, seed=4).get_edge_costs())
+
+    def test_generate_map_has_a_tile_everywhere(self):
+        map_ = generate_map(7, 5, impassable_clusters=2, cluster_size=4)
+        for point in Point(0, 0).to_rectangle(7, 5):
+            self.assertTrue(map_.has_tile(point))
+            self.assertEqual(map_.get_tile(point).get_point(), point)
+
+    def test_get_value_noise(self):
+        rows = get_value_noise(21, 13, random.Random(1), 4, amplitude=3.0)
+        self.assertEqual(len(rows), 13)
+        self.assertTrue(all(len(row) == 21 for row in rows))
+        values = [value for row in rows for value in row]
+        self.assertTrue(all(0 <= value < 3.0 for value in values))
+        self.assertTrue(all(abs(row[x] - row[x + 1]) < 1.5 for row in rows for x in range(20)))
+
+    def test_get_value_noise_raises_error_for_bad_scale(self):
+        self.assertRaises(ValueError, get_value_noise, 5, 5, random.Random(), 0)
+
+    def test_get_elevations(self):
+        elevations = get_elevations(40, 40, random.Random(2), 4, 8)
+        self.assertEqual(len(elevations), 1600)
+        self.assertEqual(set(elevations), {0, 1, 2, 3, 4})
+
+    def test_get_terrain_mvs(self):
+        self.assertEqual(set(get_terrain_mvs(10, 10, random.Random(0), 0, 3)), {1})
+        terrain_mvs = get_terrain_mvs(10, 10, random.Random(0), 5, 3)
+        self.assertTrue(set(terrain_mvs) <= {1, 2, 3})
+        self.assertGreater(len(set(terrain_mvs)), 1)
+
+    def test_get_impassable(self):
+        self.assertEqual(sum(get_impassable(10, 10, random.Random(0), 0, 5)), 0)
+        impassable = get_impassable(30, 30, random.Random(0), 1, 12)
+        self.assertEqual(sum(impassable), 12)
+        cells = [(index % 30, index // 30) for index, flag in enumerate(impassable) if flag]
+        for x, y in cells:
+            neighbours = {(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)}
+            self.assertTrue(neighbours & set(cells))
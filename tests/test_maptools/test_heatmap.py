@@ -0,0 +1,155 @@
+import copy
+import pickle
+import unittest
+
+from battle.maptools.direction import Direction
+from battle.maptools.footprint import FootPrint, Token
+from battle.maptools.heatmap import HeatMap
+from battle.maptools.map import Map
+from battle.maptools.point import Point
+from battle.maptools.tile import Tile
+from battle.maptools.vector import Vector, DangerOpportunity
+
+
+N, S, E, W = Direction
+
+
+class TestHeatMap(unittest.TestCase):
+    def setUp(self):
+        self.heat_map = HeatMap(4, 3)
+
+    def test_add_footprint_and_get_vectors(self):
+        self.heat_map.add_footprint(Point(1, 2), FootPrint(Token.ATTACKING, E, 'team'))
+        self.heat_map.add_footprint(Point(1, 2), FootPrint(Token.DANGER, S, 'team'))
+        self.heat_map.add_footprint(Point(1, 2), FootPrint(Token.DEAD, N, 'other'))
+        self.assertEqual(self.heat_map.get_vectors('team', Point(1, 2)),
+                         DangerOpportunity(Vector(1, -1), Vector(2, 0)))
+        self.assertEqual(self.heat_map.get_vectors('other', Point(1, 2)),
+                         DangerOpportunity(Vector(0, 2), Vector(0, 0)))
+        self.assertEqual(self.heat_map.get_vectors('team', Point(0, 0)), DangerOpportunity.empty())
+        self.assertEqual(self.heat_map.get_vectors('nobody', Point(1, 2)), DangerOpportunity.empty())
+        self.assertEqual(sorted(self.heat_map.get_teams()), ['other', 'team'])
+
+    def test_add_footprint_off_map_raises_error(self):
+        self.assertRaises(ValueError, self.heat_map.add_footprint, Point(4, 0), FootPrint(Token.DANGER, N, 'team'))
+
+    def test_get_many_vectors_and_get_totals(self):
+        self.heat_map.add_footprint(Point(0, 0), FootPrint(Token.ATTACKING, W, 'team'))
+        self.heat_map.add_footprint(Point(3, 2), FootPrint(Token.OBJECTIVE, N, 'team'))
+        points = [Point(0, 0), Point(3, 2), Point(1, 1), Point(-1, 0)]
+        self.assertEqual(self.heat_map.get_many_vectors('team', points),
+                         [DangerOpportunity(Vector(-1, 0), Vector(-2, 0)),
+                          DangerOpportunity(Vector(0, 0), Vector(0, 1)),
+                          DangerOpportunity.empty(), DangerOpportunity.empty()])
+        self.assertEqual(self.heat_map.get_totals('team', points), [(1, 2), (0, 1), (0, 0), (0, 0)])
+
+    def test_get_field(self):
+        self.heat_map.add_footprint(Point(2, 1), FootPrint(Token.DANGER, E, 'team'))
+        danger_x, danger_y, opportunity_x, opportunity_y = self.heat_map.get_field('team')
+        self.assertEqual(len(danger_x), 12)
+        self.assertEqual(danger_x[6], 1)
+        self.assertEqual(sum(danger_x) + sum(danger_y) + sum(opportunity_x) + sum(opportunity_y), 1)
+        self.assertEqual(list(self.heat_map.get_field('nobody')[0]), [0] * 12)
+
+    def test_decay(self):
+        self.heat_map.add_footprint(Point(2, 1), FootPrint(Token.DEAD, E, 'team'))
+        field = self.heat_map.get_field('team')
+        self.heat_map.decay(0.25)
+        self.assertEqual(self.heat_map.get_vectors('team', Point(2, 1)).danger, Vector(0.5, 0))
+        self.assertEqual(field[0][6], 0.5)
+        self.assertRaises(ValueError, self.heat_map.decay, 1.5)
+
+    def test_diffuse(self):
+        self.heat_map.add_footprint(Point(1, 1), FootPrint(Token.DEAD, E, 'team'))
+        self.heat_map.diffuse(0.5)
+        danger_x = self.heat_map.get_field('team')[0]
+        self.assertEqual(danger_x[5], 1)
+        for point in [Point(0, 1), Point(2, 1), Point(1, 0), Point(1, 2)]:
+            self.assertEqual(self.heat_map.get_vectors('team', point).danger, Vector(0.25, 0))
+        self.assertAlmostEqual(sum(danger_x), 2)
+        self.assertRaises(ValueError, self.heat_map.diffuse, -0.1)
+
+    def test_diffuse_keeps_heat_at_edges(self):
+        self.heat_map.add_footprint(Point(0, 0), FootPrint(Token.DANGER, N, 'team'))
+        self.heat_map.diffuse(1)
+        danger_y = self.heat_map.get_field('team')[1]
+        self.assertEqual(danger_y[0], 0.5)
+        self.assertEqual(danger_y[1], 0.25)
+        self.assertEqual(danger_y[4], 0.25)
+        self.assertAlmostEqual(sum(danger_y), 1)
+
+    def test_clear(self):
+        self.heat_map.add_footprint(Point(0, 0), FootPrint(Token.DANGER, N, 'team'))
+        self.heat_map.clear()
+        self.assertEqual(self.heat_map.get_teams(), [])
+
+
+class TestMapHeatMap(unittest.TestCase):
+    def setUp(self):
+        self.map = Map(3, 3, [Tile() for _ in range(9)])
+
+    def test_get_heat_map_is_kept(self):
+        heat_map = self.map.get_heat_map()
+        self.assertIs(self.map.get_heat_map(), heat_map)
+        self.assertEqual(heat_map.get_size(), (3, 3))
+
+    def test_heat_map_counts_footprints_on_tiles_when_laid(self):
+        tile = Tile(point=Point(1, 1))
+        tile.add_footprint(FootPrint(Token.DANGER, N, 'team'))
+        tile.add_footprint(FootPrint(Token.DANGER, E, 'team'))
+        map_ = Map(3, 3, [tile] + [Tile() for _ in range(8)])
+        self.assertEqual(map_.get_heat_map().get_vectors('team', Point(1, 1)).danger, Vector(1, 1))
+
+    def test_heat_map_does_not_depend_on_when_it_is_asked_for(self):
+        self.map.get_tile(Point(1, 1)).add_footprint(FootPrint(Token.DANGER, N, 'team'))
+        heat_map = self.map.get_heat_map()
+        self.map.get_tile(Point(1, 1)).add_footprint(FootPrint(Token.DANGER, E, 'team'))
+        self.assertEqual(heat_map.get_vectors('team', Point(1, 1)).danger, Vector(1, 1))
+
+    def test_heat_map_follows_add_footprint(self):
+        heat_map = self.map.get_heat_map()
+        self.map.set_tile(Tile(point=Point(2, 0)))
+        self.map.set_tile(Tile(point=Point(0, 2), max_footprints=1))
+        self.map.get_tile(Point(2, 0)).add_footprint(FootPrint(Token.OBJECTIVE, W, 'team'))
+        self.map.get_tile(Point(0, 2)).add_footprint(FootPrint(Token.DANGER, S, 'team'))
+        self.map.get_tile(Point(0, 2)).add_footprint(FootPrint(Token.DANGER, S, 'team'))
+        self.assertEqual(heat_map.get_vectors('team', Point(2, 0)).opportunity, Vector(-1, 0))
+        self.assertEqual(heat_map.get_vectors('team', Point(0, 2)).danger, Vector(0, -2))
+
+    def test_heat_map_follows_lazy_tiles(self):
+        from array import array
+        map_ = Map.from_buffers(2, 2, array('d', [0] * 4), array('l', [1] * 4), bytearray(4))
+        heat_map = map_.get_heat_map()
+        map_.get_tile(Point(1, 1)).add_footprint(FootPrint(Token.DEAD, W, 'team'))
+        self.assertEqual(heat_map.get_vectors('team', Point(1, 1)).danger, Vector(-2, 0))
+
+    def test_set_tile_detaches_replaced_tile(self):
+        old_tile = self.map.get_tile(Point(1, 1))
+        new_tile = Tile(point=Point(1, 1))
+        new_tile.add_footprint(FootPrint(Token.DANGER, N, 'team'))
+        self.map.set_tile(new_tile)
+        old_tile.add_footprint(FootPrint(Token.DANGER, E, 'team'))
+        self.assertEqual(self.map.get_heat_map().get_vectors('team', Point(1, 1)).danger, Vector(0, 1))
+
+    def test_set_tile_again_does_not_count_footprints_twice(self):
+        tile = self.map.get_tile(Point(1, 1))
+        tile.add_footprint(FootPrint(Token.DANGER, N, 'team'))
+        self.map.set_tile(tile)
+        tile.add_footprint(FootPrint(Token.DANGER, N, 'team'))
+        self.assertEqual(self.map.get_heat_map().get_vectors('team', Point(1, 1)).danger, Vector(0, 2))
+
+    def test_copied_map_heat_map_follows_its_own_tiles(self):
+        self.map.get_tile(Point(1, 1)).add_footprint(FootPrint(Token.DANGER, N, 'team'))
+        for copied in (copy.deepcopy(self.map), pickle.loads(pickle.dumps(self.map))):
+            copied.get_tile(Point(1, 1)).add_footprint(FootPrint(Token.DANGER, E, 'team'))
+            self.assertEqual(copied.get_heat_map().get_vectors('team', Point(1, 1)).danger, Vector(1, 1))
+        self.assertEqual(self.map.get_heat_map().get_vectors('team', Point(1, 1)).danger, Vector(0, 1))
+
+    def test_copied_tile_leaves_map_behind(self):
+        tile = self.map.get_tile(Point(1, 1))
+        for copied in (copy.deepcopy(tile), pickle.loads(pickle.dumps(tile))):
+            self.assertIsNone(copied._footprint_listener)
+            copied.add_footprint(FootPrint(Token.DANGER, N, 'team'))
+        self.assertEqual(self.map.get_heat_map().get_vectors('team', Point(1, 1)), DangerOpportunity.empty())
+        self.assertEqual(len(pickle.dumps(tile)), len(pickle.dumps(Tile(point=Point(1, 1)))))
+
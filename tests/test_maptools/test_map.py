@@ -1,8 +1,11 @@
+import pickle
 import unittest
+from array import array
 
-from battle.maptools.map import Map, MapPlacementError
+from battle.maptools.direction import Direction
+from battle.maptools.map import Map, MapPlacementError, MapEvent, DIRECTIONS, NO_EDGE
 from battle.maptools.point import Point
-from battle.maptools.tile import Tile
+from battle.maptools.tile import Tile, ImpassableTile
 from battle.players.units import Soldier
 
 
@@ -72,6 +75,19 @@ class TestMap(unittest.TestCase):
         self.assertEqual(map_.get_elevation(Point(0, 1)), -1)
         self.assertEqual(map_.get_elevation(Point(1, 1)), 0)
 
+    def test_get_elevation_is_int_like_tile(self):
+        tiles = [Tile(point=Point(0, 0), elevation=2), ImpassableTile(point=Point(1, 0))]
+        map_ = Map(2, 2, tiles)
+        self.assertIsInstance(map_.get_elevation(Point(0, 0)), int)
+        self.assertEqual(map_.get_elevation(Point(1, 0)), float('inf'))
+        self.assertEqual(map_.get_elevation(Point(1, 1)), float('-inf'))
+
+    def test_get_elevation_from_buffers_is_int_like_its_tiles(self):
+        map_ = Map.from_buffers(2, 1, array('d', [2., 1.5]), array('l', [1, 1]), bytearray(2))
+        for point in (Point(0, 0), Point(1, 0)):
+            self.assertIsInstance(map_.get_elevation(point), int)
+            self.assertEqual(map_.get_elevation(point), map_.get_tile(point).get_elevation())
+
     def test_get_elevation_empty_tile_and_not_on_map(self):
         elevations = {Point(0, 0): 1, Point(1, 0): 2,
                       Point(0, 1): -1, }
@@ -90,6 +106,70 @@ class TestMap(unittest.TestCase):
         for point in points:
             self.assertFalse(self.map.is_on_map(point))
 
+    def test_contains_xy(self):
+        for point in Point(0, 0).to_rectangle(self.width, self.height):
+            self.assertTrue(self.map.contains_xy(point.x, point.y))
+        for x, y in [(-1, 0), (0, -1), (5, 0), (0, 3), (5, 3)]:
+            self.assertFalse(self.map.contains_xy(x, y))
+
+    def test_get_point_cache_holds_map_points(self):
+        cache = self.map.get_point_cache()
+        self.assertIs(cache, self.map.get_point_cache())
+        self.assertEqual(len(cache), self.width * self.height)
+        self.assertIs(cache.get(1, 1), self.map.get_tile(Point(1, 1)).get_point())
+
+    def test_from_buffers(self):
+        elevations = array('d', [0, 1, 2, 3, 4, 5])
+        terrain_mvs = array('l', [1, 2, 1, 3, 1, 1])
+        impassable = bytearray([0, 0, 0, 0, 1, 0])
+        map_ = Map.from_buffers(3, 2, elevations, terrain_mvs, impassable)
+        self.assertEqual(map_.get_size(), (3, 2))
+        self.assertEqual(map_.get_elevation(Point(1, 1)), float('inf'))
+        self.assertTrue(map_.is_impassable(Point(1, 1)))
+        self.assertEqual(map_.get_elevation(Point(2, 0)), 2)
+        self.assertEqual(map_.get_terrain_mv(Point(0, 1)), 3)
+        self.assertEqual(elevations[4], 4)
+
+        tile = map_.get_tile(Point(1, 0))
+        self.assertEqual((tile.get_elevation(), tile.get_terrain_mv(), tile.get_point()), (1, 2, Point(1, 0)))
+        self.assertIs(map_.get_tile(Point(1, 0)), tile)
+        self.assertIsInstance(map_.get_tile(Point(1, 1)), ImpassableTile)
+
+    def test_from_buffers_edge_costs_match_tiles(self):
+        elevations = array('d', [0, 3, 1, 2, 0, 4, 1, 1, 2])
+        terrain_mvs = array('l', [1, 2, 1, 3, 1, 1, 2, 2, 1])
+        impassable = bytearray([0, 0, 0, 0, 1, 0, 0, 0, 0])
+        map_ = Map.from_buffers(3, 3, elevations, terrain_mvs, impassable)
+        tiles = [map_.get_tile(point) for point in Point(0, 0).to_rectangle(3, 3)]
+        self.assertEqual(map_.get_edge_costs(), Map(3, 3, tiles).get_edge_costs())
+
+    def test_from_buffers_without_copy_uses_buffers(self):
+        elevations = array('d', [0, 1, float('inf'), 3])
+        terrain_mvs = array('l', [1, 1, 1, 1])
+        impassable = bytearray([0, 0, 1, 0])
+        map_ = Map.from_buffers(2, 2, elevations, terrain_mvs, impassable, copy=False)
+        self.assertIs(map_.get_buffers()[0], elevations)
+        map_.set_tile(Tile(elevation=5, terrain_mv=2, point=Point(1, 0)))
+        self.assertEqual((elevations[1], terrain_mvs[1]), (5, 2))
+
+    def test_get_buffers(self):
+        self.map.set_tile(ImpassableTile(point=Point(1, 0)))
+        elevations, terrain_mvs, impassable = self.map.get_buffers()
+        self.assertEqual(len(elevations), 15)
+        self.assertEqual(elevations[1], float('inf'))
+        self.assertEqual((impassable[0], impassable[1]), (0, 1))
+        self.assertEqual(terrain_mvs[0], 1)
+
+    def test_from_buffers_raises_error_for_wrong_length(self):
+        self.assertRaises(MapPlacementError, Map.from_buffers, 2, 2, array('d', [0] * 3), array('l', [1] * 4),
+                          bytearray(4))
+
+    def test_init_many_pointless_tiles(self):
+        tiles = [Tile(elevation=index % 7) for index in range(100 * 100)]
+        map_ = Map(100, 100, tiles)
+        self.assertIs(map_.get_tile(Point(37, 52)), tiles[5237])
+        self.assertEqual(tiles[5237].get_point(), Point(37, 52))
+
     def test_has_tile_off_map(self):
         self.assertFalse(self.map.has_tile(Point(-1, -1)))
 
@@ -177,6 +257,208 @@ class TestMap(unittest.TestCase):
         self.assertTrue(self.map.can_place_unit(Point(1, 1)))
         self.assertEqual(self.map.get_point(self.unit), None)
 
+    def test_get_tile_off_map_is_none(self):
+        self.assertIsNone(self.map.get_tile(Point(-1, 0)))
+
+    def test_get_terrain_mv(self):
+        tiles = [Tile(terrain_mv=3, point=Point(0, 0)), Tile(terrain_mv=1, point=Point(1, 0))]
+        map_ = Map(2, 2, tiles)
+        self.assertEqual(map_.get_terrain_mv(Point(0, 0)), 3)
+        self.assertEqual(map_.get_terrain_mv(Point(1, 0)), 1)
+        self.assertEqual(map_.get_terrain_mv(Point(1, 1)), 0)
+        self.assertEqual(map_.get_terrain_mv(Point(5, 5)), 0)
+
+    def test_is_impassable(self):
+        tiles = [ImpassableTile(point=Point(0, 0)), Tile(point=Point(1, 0))]
+        map_ = Map(2, 2, tiles)
+        self.assertTrue(map_.is_impassable(Point(0, 0)))
+        self.assertFalse(map_.is_impassable(Point(1, 0)))
+        self.assertFalse(map_.is_impassable(Point(1, 1)))
+        self.assertFalse(map_.is_impassable(Point(-1, 0)))
+        self.assertEqual(map_.get_elevation(Point(0, 0)), float('inf'))
+
+    def test_remove_unit_no_unit_does_nothing(self):
+        self.map.remove_unit(Point(1, 1))
+        self.map.remove_unit(Point(-1, 1))
+        self.assertTrue(self.map.can_place_unit(Point(1, 1)))
+
+    def test_remove_all_units(self):
+        unit_2 = Soldier()
+        self.map.place_unit(self.unit, Point(1, 1))
+        self.map.place_unit(unit_2, Point(2, 1))
+        self.map.remove_all_units()
+        self.assertFalse(self.map.has_unit(Point(1, 1)))
+        self.assertFalse(self.map.has_unit(Point(2, 1)))
+        self.assertIsNone(self.map.get_point(self.unit))
+        self.assertIsNone(self.map.get_point(unit_2))
+
+    def test_set_tile(self):
+        new_tile = Tile(elevation=3, terrain_mv=2, point=Point(1, 1))
+        self.map.set_tile(new_tile)
+        self.assertIs(self.map.get_tile(Point(1, 1)), new_tile)
+        self.assertEqual(self.map.get_elevation(Point(1, 1)), 3)
+        self.assertEqual(self.map.get_terrain_mv(Point(1, 1)), 2)
+
+    def test_set_tile_raises_error_for_missing_or_off_map_point(self):
+        self.assertRaises(MapPlacementError, self.map.set_tile, Tile())
+        self.assertRaises(MapPlacementError, self.map.set_tile, Tile(point=Point(10, 10)))
+
+    def test_get_terrain_version(self):
+        self.assertEqual(self.map.get_terrain_version(), 0)
+        self.map.set_tile(Tile(point=Point(1, 1)))
+        self.assertEqual(self.map.get_terrain_version(), 1)
+        self.map.place_unit(self.unit, Point(1, 1))
+        self.assertEqual(self.map.get_terrain_version(), 1)
+
+    def test_get_unit_version(self):
+        self.assertEqual(self.map.get_unit_version(), 0)
+        self.map.place_unit(self.unit, Point(1, 1))
+        self.assertEqual(self.map.get_unit_version(), 1)
+        self.map.remove_unit(Point(1, 1))
+        self.assertEqual(self.map.get_unit_version(), 2)
+        self.map.remove_unit(Point(1, 1))
+        self.assertEqual(self.map.get_unit_version(), 2)
+        self.map.remove_all_units()
+        self.assertEqual(self.map.get_unit_version(), 3)
+        self.map.set_tile(Tile(point=Point(1, 1)))
+        self.assertEqual(self.map.get_unit_version(), 3)
+
+    def test_subscribe(self):
+        events = []
+        self.map.subscribe(lambda event, point, unit: events.append((event, point, unit)))
+        self.map.set_tile(Tile(point=Point(1, 1)))
+        self.map.place_unit(self.unit, Point(2, 2))
+        self.map.remove_unit(Point(2, 2))
+        self.map.remove_unit(Point(2, 2))
+        self.map.remove_all_units()
+        expected = [(MapEvent.TILE_CHANGED, Point(1, 1), None),
+                    (MapEvent.UNIT_PLACED, Point(2, 2), self.unit),
+                    (MapEvent.UNIT_REMOVED, Point(2, 2), self.unit),
+                    (MapEvent.ALL_UNITS_REMOVED, None, None)]
+        self.assertEqual(events, expected)
+
+    def test_unsubscribe(self):
+        events = []
+
+        def subscriber(event, point, unit):
+            events.append(event)
+
+        self.map.subscribe(subscriber)
+        self.map.unsubscribe(subscriber)
+        self.map.set_tile(Tile(point=Point(1, 1)))
+        self.assertEqual(events, [])
+
+    def test_subscribe_holds_bound_methods_weakly(self):
+        events = []
+
+        class Listener(object):
+            def on_change(self, event, point, unit):
+                events.append(event)
+
+        listener = Listener()
+        self.map.subscribe(listener.on_change)
+        self.map.set_tile(Tile(point=Point(1, 1)))
+        del listener
+        self.map.set_tile(Tile(point=Point(1, 1)))
+        self.assertEqual(events, [MapEvent.TILE_CHANGED])
+        self.assertEqual(self.map._subscribers, [])
+
+    def test_pickle_drops_subscribers(self):
+        self.map.subscribe(print)
+        self.map.place_unit(self.unit, Point(1, 1))
+        copied = pickle.loads(pickle.dumps(self.map))
+        self.assertEqual(copied._subscribers, [])
+        self.assertEqual(copied.get_unit_version(), 1)
+        self.assertTrue(copied.has_unit(Point(1, 1)))
+
+    def test_get_unit_points_near(self):
+        unit_2 = Soldier()
+        unit_3 = Soldier()
+        self.map.place_unit(self.unit, Point(0, 0))
+        self.map.place_unit(unit_2, Point(2, 1))
+        self.map.place_unit(unit_3, Point(4, 2))
+        self.assertEqual(self.map.get_unit_points_near(Point(0, 0), 0), [Point(0, 0)])
+        self.assertEqual(sorted(self.map.get_unit_points_near(Point(1, 1), 2)), [Point(0, 0), Point(2, 1)])
+        self.assertEqual(sorted(self.map.get_unit_points_near(Point(-5, -5), 100)),
+                         [Point(0, 0), Point(2, 1), Point(4, 2)])
+
+    def test_get_unit_points_near_after_remove(self):
+        self.map.place_unit(self.unit, Point(1, 1))
+        self.map.remove_unit(Point(1, 1))
+        self.assertEqual(self.map.get_unit_points_near(Point(1, 1), 3), [])
+        self.map.place_unit(self.unit, Point(2, 2))
+        self.map.remove_all_units()
+        self.assertEqual(self.map.get_unit_points_near(Point(1, 1), 3), [])
+
+    def test_get_unit_points_near_across_buckets(self):
+        map_ = Map(40, 40, [])
+        for point in Point(0, 0).to_rectangle(40, 40):
+            map_.set_tile(Tile(point=point))
+        points = [Point(0, 0), Point(9, 9), Point(17, 3), Point(39, 39)]
+        for point in points:
+            map_.place_unit(Soldier(), point)
+        self.assertEqual(sorted(map_.get_unit_points_near(Point(8, 8), 16)), [Point(0, 0), Point(17, 3), Point(9, 9)])
+        self.assertEqual(sorted(map_.get_unit_points_near(Point(39, 30), 9)), [Point(39, 39)])
+
+    def test_get_index_and_get_point_at_index(self):
+        self.assertEqual(self.map.get_index(Point(0, 0)), 0)
+        self.assertEqual(self.map.get_index(Point(2, 1)), 7)
+        self.assertIsNone(self.map.get_index(Point(5, 0)))
+        self.assertEqual(self.map.get_point_at_index(7), Point(2, 1))
+
+    def test_get_index_offsets(self):
+        offsets = dict(zip(DIRECTIONS, self.map.get_index_offsets()))
+        self.assertEqual(offsets, {Direction.N: 5, Direction.S: -5, Direction.E: 1, Direction.W: -1})
+
+    def test_get_edge_costs_matches_move_pts(self):
+        map_ = get_mixed_terrain_map()
+        edge_costs = map_.get_edge_costs()
+        self.assertEqual(len(edge_costs), 4 * 9)
+        for point in Point(0, 0).to_rectangle(3, 3):
+            for direction_index, direction in enumerate(DIRECTIONS):
+                cost = edge_costs[map_.get_index(point) * 4 + direction_index]
+                neighbour = point.in_direction(direction)
+                if not map_.has_tile(point) or not map_.has_tile(neighbour):
+                    self.assertEqual(cost, NO_EDGE)
+                elif map_.is_impassable(neighbour) and not map_.is_impassable(point):
+                    self.assertEqual(cost, NO_EDGE)
+                else:
+                    self.assertEqual(cost, map_.get_tile(point).move_pts(map_.get_tile(neighbour)))
+
+    def test_get_edge_costs_is_cached(self):
+        self.assertIs(self.map.get_edge_costs(), self.map.get_edge_costs())
+
+    def test_get_edge_costs_updated_by_set_tile(self):
+        map_ = get_mixed_terrain_map()
+        edge_costs = map_.get_edge_costs()
+        map_.set_tile(Tile(elevation=4, terrain_mv=2, point=Point(1, 1)))
+        rebuilt = get_mixed_terrain_map()
+        rebuilt.set_tile(Tile(elevation=4, terrain_mv=2, point=Point(1, 1)))
+        self.assertEqual(map_.get_edge_costs(), rebuilt.get_edge_costs())
+        self.assertIs(map_.get_edge_costs(), edge_costs)
+
+    def test_has_unit_at_index(self):
+        self.map.place_unit(self.unit, Point(1, 1))
+        self.assertTrue(self.map.has_unit_at_index(6))
+        self.assertFalse(self.map.has_unit_at_index(0))
+
+    def test_get_min_terrain_mv(self):
+        map_ = get_mixed_terrain_map()
+        self.assertEqual(map_.get_min_terrain_mv(), 1)
+        map_ = Map(2, 1, [Tile(terrain_mv=3), Tile(terrain_mv=2)])
+        self.assertEqual(map_.get_min_terrain_mv(), 2)
+        map_.set_tile(Tile(terrain_mv=4, point=Point(1, 0)))
+        self.assertEqual(map_.get_min_terrain_mv(), 3)
+        self.assertEqual(Map(2, 2, []).get_min_terrain_mv(), 1)
+
+
+def get_mixed_terrain_map():
+    tiles = [Tile(elevation=0, terrain_mv=1, point=Point(0, 0)), Tile(elevation=2, terrain_mv=3, point=Point(1, 0)),
+             ImpassableTile(point=Point(2, 0)), Tile(elevation=1, terrain_mv=2, point=Point(0, 1)),
+             Tile(elevation=0, point=Point(1, 1)), ImpassableTile(point=Point(2, 1)),
+             Tile(elevation=5, point=Point(0, 2)), Tile(elevation=1, terrain_mv=4, point=Point(2, 2))]
+    return Map(3, 3, tiles)
+
 
 def get_tiles_without_points(width, height):
     pt_list = get_pt_list(width, height)
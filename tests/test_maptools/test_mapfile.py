@@ -0,0 +1,113 @@
+import os
+import pickle
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+from array import array
+
+from battle.maptools.generator import generate_map
+from battle.maptools.map import Map
+from battle.maptools.mapfile import HEADER, MapFileError, load_map, read_buffers, read_header, save_map
+from battle.maptools.point import Point
+from battle.maptools.tile import Tile, ImpassableTile
+
+
+class TestMapFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'map.bmap')
+        self.map = generate_map(12, 9, seed=2, impassable_clusters=3, cluster_size=5, terrain_regions=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assert_same_terrain(self, map_1: Map, map_2: Map):
+        self.assertEqual(map_1.get_size(), map_2.get_size())
+        for point in Point(0, 0).to_rectangle(*map_1.get_size()):
+            self.assertEqual(map_1.get_elevation(point), map_2.get_elevation(point))
+            self.assertEqual(map_1.get_terrain_mv(point), map_2.get_terrain_mv(point))
+            self.assertEqual(map_1.is_impassable(point), map_2.is_impassable(point))
+
+    def test_save_map_and_read_header(self):
+        save_map(self.map, self.path)
+        self.assertEqual(read_header(self.path)[:2], (12, 9))
+        self.assertEqual(os.path.getsize(self.path), HEADER.size + 17 * 12 * 9)
+
+    def test_load_map(self):
+        save_map(self.map, self.path)
+        loaded = load_map(self.path)
+        self.assert_same_terrain(loaded, self.map)
+        self.assertEqual(loaded.get_edge_costs(), self.map.get_edge_costs())
+        self.assertIsInstance(loaded.get_buffers()[0], memoryview)
+
+    def test_load_map_without_mmap(self):
+        save_map(self.map, self.path)
+        loaded = load_map(self.path, use_mmap=False)
+        self.assert_same_terrain(loaded, self.map)
+        self.assertIsInstance(loaded.get_buffers()[0], array)
+
+    def test_load_map_keeps_missing_tiles(self):
+        map_ = Map(2, 2, [Tile(elevation=3, point=Point(0, 0)), ImpassableTile(point=Point(1, 1))])
+        save_map(map_, self.path)
+        loaded = load_map(self.path)
+        self.assertFalse(loaded.has_tile(Point(1, 0)))
+        self.assertIsNone(loaded.get_tile(Point(1, 0)))
+        self.assertEqual(loaded.get_tile(Point(0, 0)).get_elevation(), 3)
+        self.assertIsInstance(loaded.get_tile(Point(1, 1)), ImpassableTile)
+
+    def test_changing_loaded_map_does_not_change_file(self):
+        save_map(self.map, self.path)
+        loaded = load_map(self.path)
+        loaded.set_tile(Tile(elevation=20, terrain_mv=4, point=Point(3, 3)))
+        self.assertEqual(loaded.get_elevation(Point(3, 3)), 20)
+        self.assert_same_terrain(load_map(self.path), self.map)
+
+    def test_pickle_unchanged_map_reopens_file(self):
+        save_map(self.map, self.path)
+        loaded = load_map(self.path)
+        data = pickle.dumps(loaded)
+        self.assertLess(len(data), 8 * 12 * 9)
+        unpickled = pickle.loads(data)
+        self.assert_same_terrain(unpickled, self.map)
+        self.assertIsInstance(unpickled.get_buffers()[0], memoryview)
+
+    def test_pickle_changed_map_keeps_changes(self):
+        save_map(self.map, self.path)
+        loaded = load_map(self.path)
+        loaded.set_tile(Tile(elevation=20, point=Point(3, 3)))
+        unpickled = pickle.loads(pickle.dumps(loaded))
+        self.assert_same_terrain(unpickled, loaded)
+        self.assertIsInstance(unpickled.get_buffers()[0], array)
+
+    def test_read_buffers_swaps_byte_order(self):
+        save_map(self.map, self.path)
+        width, height, _ = read_header(self.path)
+        elevations, terrain_mvs, impassable = read_buffers(self.path)
+        elevations.byteswap()
+        terrain_mvs.byteswap()
+        other_order = b'>' if sys.byteorder == 'little' else b'<'
+        with open(self.path, 'wb') as map_file:
+            map_file.write(HEADER.pack(b'BMAP', 1, other_order, width, height))
+            map_file.write(elevations.tobytes() + terrain_mvs.tobytes() + bytes(impassable))
+        self.assert_same_terrain(load_map(self.path), self.map)
+
+    def test_bad_files_raise_error(self):
+        with open(self.path, 'wb') as map_file:
+            map_file.write(b'BMAP')
+        self.assertRaises(MapFileError, load_map, self.path)
+
+        with open(self.path, 'wb') as map_file:
+            map_file.write(struct.pack('<4sHcxII', b'NOPE', 1, b'<', 1, 1) + bytes(17))
+        self.assertRaises(MapFileError, load_map, self.path)
+
+        with open(self.path, 'wb') as map_file:
+            map_file.write(struct.pack('<4sHcxII', b'BMAP', 2, b'<', 1, 1) + bytes(17))
+        self.assertRaises(MapFileError, load_map, self.path)
+
+        save_map(self.map, self.path)
+        with open(self.path, 'ab') as map_file:
+            map_file.write(b'extra')
+        self.assertRaises(MapFileError, load_map, self.path)
+        self.assertRaises(MapFileError, load_map, self.path, use_mmap=False)
@@ -1,7 +1,7 @@
 import unittest
 
 from battle.maptools.direction import Direction
-from battle.maptools.point import Point
+from battle.maptools.point import Point, PointCache, get_ring_offsets
 
 N, S, E, W = Direction.N, Direction.S, Direction.E, Direction.W
 
@@ -75,7 +75,11 @@ class TestPoint(unittest.TestCase):
         self.assertEqual(repr(Point(1, 2)), 'Point(1, 2)')
 
     def test_hash(self):
-        self.assertEqual(hash(Point(1, 2)), hash('Point(1, 2)'))
+        self.assertEqual(hash(Point(1, 2)), hash((1, 2)))
+        self.assertEqual(hash(Point(1, 2)), hash(Point(1, 2)))
+
+    def test_no_instance_dict(self):
+        self.assertRaises(AttributeError, setattr, Point(1, 2), 'z', 3)
         
     def test_north(self):
         point = Point(1, 2)
@@ -122,6 +126,43 @@ class TestPoint(unittest.TestCase):
                     Point(0, 2)]
         self.assertEqual(answer, expected)
 
+    def test_at_distance_with_cache_reuses_points(self):
+        cache = PointCache()
+        first = Point(0, 0).at_distance(2, cache)
+        second = Point(0, 0).at_distance(2, cache)
+        self.assertEqual(first, Point(0, 0).at_distance(2))
+        for point_1, point_2 in zip(first, second):
+            self.assertIs(point_1, point_2)
+        self.assertEqual(len(cache), 8)
+
+    def test_point_cache_get(self):
+        seed = Point(1, 2)
+        cache = PointCache([seed])
+        self.assertIs(cache.get(1, 2), seed)
+        new_point = cache.get(2, 2)
+        self.assertEqual(new_point, Point(2, 2))
+        self.assertIs(cache.get(2, 2), new_point)
+        self.assertEqual(len(cache), 2)
+
+    def test_point_cache_clear(self):
+        cache = PointCache([Point(1, 2)])
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_get_ring_offsets(self):
+        self.assertEqual(get_ring_offsets(0), ((0, 0),))
+        self.assertEqual(get_ring_offsets(1), ((0, -1), (-1, 0), (1, 0), (0, 1)))
+        self.assertIs(get_ring_offsets(3), get_ring_offsets(3))
+
+    def test_get_ring_offsets_matches_sorted_points(self):
+        for distance in range(6):
+            points = [Point(*offset) for offset in get_ring_offsets(distance)]
+            self.assertEqual(points, sorted(points))
+            self.assertEqual(len(points), max(1, 4 * distance))
+
+    def test_at_distance_negative_is_empty(self):
+        self.assertEqual(Point(0, 0).at_distance(-1), [])
+
     def test_to_rectangle_one_by_one(self):
         self.assertEqual(Point(1, 1).to_rectangle(1, 1), [Point(1, 1)])
         self.assertEqual(Point(1, 1).to_rectangle(-1, 1), [Point(1, 1)])
@@ -1,4 +1,5 @@
 import unittest
+import weakref
 
 from battle.maptools.direction import Direction
 from battle.maptools.point import Point
@@ -117,6 +118,45 @@ class TestTile(unittest.TestCase):
         self.assertEqual(tile.footprint_vectors(),
                          {'team': footprint.vectorize()})
 
+    def test_get_footprints_newest_first(self):
+        footprint = FootPrint(Token.ATTACKING, Direction.N, 'team')
+        footprint2 = FootPrint(Token.DANGER, Direction.E, 'team')
+        tile = Tile()
+        tile.add_footprint(footprint)
+        tile.add_footprint(footprint2)
+        self.assertEqual(tile.get_footprints(), [footprint2, footprint])
+
+    def test_set_footprint_listener(self):
+        heard = []
+        footprint = FootPrint(Token.ATTACKING, Direction.N, 'team')
+        tile = Tile()
+        tile.set_footprint_listener(lambda tile_, footprint_: heard.append((tile_, footprint_)))
+        tile.add_footprint(footprint)
+        self.assertEqual(heard, [(tile, footprint)])
+        tile.set_footprint_listener(None)
+        tile.add_footprint(footprint)
+        self.assertEqual(len(heard), 1)
+
+    def test_set_footprint_listener_holds_bound_method_weakly(self):
+        class Owner(object):
+            def __init__(self):
+                self.heard = []
+
+            def listen(self, tile_, footprint_):
+                self.heard.append(footprint_)
+
+        footprint = FootPrint(Token.ATTACKING, Direction.N, 'team')
+        owner = Owner()
+        tile = Tile()
+        tile.set_footprint_listener(owner.listen)
+        tile.add_footprint(footprint)
+        self.assertEqual(owner.heard, [footprint])
+        owner_ref = weakref.ref(owner)
+        del owner
+        self.assertIsNone(owner_ref())
+        tile.add_footprint(footprint)
+        self.assertEqual(len(tile.get_footprints()), 2)
+
     def test_add_footprint_multiple_footprints_single_team(self):
         team = 'team'
         footprint = FootPrint(Token.ATTACKING, Direction.N, team)
@@ -1,6 +1,7 @@
 import unittest
 
-from battle.maptools.vector import Vector, DangerOpportunity
+from battle.maptools.vector import (Vector, DangerOpportunity, VectorSum, DangerOpportunitySum, sum_vectors,
+                                     sum_danger_opportunities)
 from battle.maptools.direction import Direction
 
 N, S, E, W = Direction
@@ -121,3 +122,51 @@ class TestVector(unittest.TestCase):
         to_add = DangerOpportunity(Vector(1, 1), Vector(-1, -1))
         expected = DangerOpportunity(Vector(2, 3), Vector(2, 4))
         self.assertEqual(test.add(to_add), expected)
+
+    def test_vector_is_slotted_and_hashable(self):
+        self.assertRaises(AttributeError, setattr, Vector(1, 2), 'z', 3)
+        self.assertRaises(AttributeError, setattr, Vector(1, 2), 'x', 3)
+        self.assertEqual(hash(Vector(1, 2)), hash(Vector(1, 2)))
+        self.assertEqual(len({Vector(1, 2), Vector(1, 2), Vector(2, 1)}), 2)
+
+    def test_dangeropportunity_is_slotted_and_hashable(self):
+        test = DangerOpportunity(Vector(1, 2), Vector(3, 4))
+        self.assertRaises(AttributeError, setattr, test, 'danger', Vector(0, 0))
+        self.assertEqual(hash(test), hash(DangerOpportunity(Vector(1, 2), Vector(3, 4))))
+
+    def test_dangeropportunity_repr(self):
+        self.assertEqual(repr(DangerOpportunity(Vector(1, 2), Vector(3, 4))),
+                         'DangerOpportunity(Vector(1, 2), Vector(3, 4))')
+
+    def test_vector_sum(self):
+        total = VectorSum()
+        total.add(Vector(1, 2))
+        total.add(Vector(-3, 1))
+        self.assertEqual((total.x, total.y), (-2, 3))
+        self.assertEqual(total.to_vector(), Vector(-2, 3))
+        total.subtract(Vector(1, 2))
+        self.assertEqual(total.to_vector(), Vector(-3, 1))
+
+    def test_vector_sum_to_vector_is_not_changed_by_later_adds(self):
+        total = VectorSum(1, 1)
+        vector = total.to_vector()
+        total.add(Vector(1, 1))
+        self.assertEqual(vector, Vector(1, 1))
+
+    def test_dangeropportunity_sum(self):
+        total = DangerOpportunitySum()
+        total.add(DangerOpportunity(Vector(1, 2), Vector(3, 4)))
+        total.add(DangerOpportunity(Vector(-1, 0), Vector(1, -5)))
+        self.assertEqual(total.to_danger_opportunity(), DangerOpportunity(Vector(0, 2), Vector(4, -1)))
+        total.subtract(DangerOpportunity(Vector(1, 2), Vector(3, 4)))
+        self.assertEqual(total.to_danger_opportunity(), DangerOpportunity(Vector(-1, 0), Vector(1, -5)))
+
+    def test_sum_vectors(self):
+        self.assertEqual(sum_vectors([]), Vector(0, 0))
+        self.assertEqual(sum_vectors(Vector.from_dir_and_mag(direction, 2) for direction in [N, N, E, S, W, W]),
+                         Vector(-2, 2))
+
+    def test_sum_danger_opportunities(self):
+        self.assertEqual(sum_danger_opportunities([]), DangerOpportunity.empty())
+        to_sum = [DangerOpportunity(Vector(1, 2), Vector(3, 5)), DangerOpportunity(Vector(1, 1), Vector(-1, -1))]
+        self.assertEqual(sum_danger_opportunities(to_sum), DangerOpportunity(Vector(2, 3), Vector(2, 4)))
@@ -1,10 +1,12 @@
+import random
 import unittest
 
 from battle.maptools.direction import Direction
 from battle.maptools.map import Map
 from battle.maptools.point import Point
 from battle.maptools.tile import Tile, ImpassableTile
-from battle.movementcalculator import MovementCalculator
+from battle.movementcalculator import MovementCalculator, MovementPaths, DistanceField
+from battle.players.team import Team
 from battle.players.units import Soldier
 
 N, S, E, W = Direction.N, Direction.S, Direction.E, Direction.W
@@ -613,3 +615,267 @@ class TestMovementCalculator(unittest.TestCase):
             Point(2, 3): (7,  [N, N, N, N, E, E, S]),
         }
         self.assertEqual(MovementCalculator(map_).get_movement_points_with_path(origin, 7), expected)
+
+    def test_get_movement_points_open_map_is_manhattan_distance(self):
+        map_ = Map(9, 9, [Tile() for _ in range(81)])
+        origin = Point(4, 4)
+        answer = MovementCalculator(map_).get_movement_points(origin, 4)
+        expected = {point: distance for distance in range(5) for point in origin.at_distance(distance)}
+        self.assertEqual(answer, expected)
+
+    def test_get_movement_points_with_path_open_map_paths_lead_to_point(self):
+        map_ = Map(9, 9, [Tile() for _ in range(81)])
+        origin = Point(4, 4)
+        answer = MovementCalculator(map_).get_movement_points_with_path(origin, 4)
+        for point, (mv_pts, path) in answer.items():
+            self.assertEqual(mv_pts, len(path))
+            self.assertEqual(list(origin.generate_path(path))[-1:], [point] if path else [])
+
+    def test_get_movement_points_negative_max_mv(self):
+        map_ = Map(2, 2, [Tile() for _ in range(4)])
+        self.assertEqual(MovementCalculator(map_).get_movement_points(Point(0, 0), -1), {})
+        self.assertEqual(MovementCalculator(map_).get_movement_points_with_path(Point(0, 0), -1), {})
+
+    def test_get_movement_paths_path_to(self):
+        map_ = Map(3, 3, [Tile() for _ in range(9)])
+        answer = MovementCalculator(map_).get_movement_paths(Point(0, 0), 4)
+        self.assertIsInstance(answer, MovementPaths)
+        self.assertEqual(answer.start, Point(0, 0))
+        self.assertEqual(answer.path_to(Point(0, 0)), [])
+        self.assertEqual(answer.path_to(Point(2, 2)), [E, E, N, N])
+        self.assertEqual(answer.get_mv_pts(Point(2, 2)), 4)
+        self.assertEqual(len(answer), 9)
+
+    def test_get_movement_paths_ties_go_to_path_that_sorts_first(self):
+        elevations = [0, 0, 0, 2, 1, 0, 1, 0, 0]
+        terrain_mvs = [1, 3, 1, 3, 3, 1, 2, 1, 2]
+        map_ = Map(3, 3, [Tile(elevation=elevation, terrain_mv=terrain_mv)
+                          for elevation, terrain_mv in zip(elevations, terrain_mvs)])
+        answer = MovementCalculator(map_).get_movement_paths(Point(0, 0), 12)
+        self.assertEqual(answer.get_mv_pts(Point(1, 2)), 8)
+        self.assertEqual(answer.path_to(Point(1, 2)), [E, E, N, N, W])
+
+    def test_get_movement_points_with_path_matches_baseline_on_random_maps(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            width = rng.randint(1, 5)
+            height = rng.randint(1, 5)
+            map_ = Map(width, height, [Tile(elevation=rng.choice([0, 0, 1, 2]), terrain_mv=rng.choice([1, 1, 2, 3]))
+                                       for _ in range(width * height)])
+            for point in rng.sample(Point(0, 0).to_rectangle(width, height), (width * height) // 6):
+                map_.place_unit(Soldier(), point)
+            start = Point(rng.randrange(width), rng.randrange(height))
+            max_mv = rng.randint(0, 10)
+            self.assertEqual(MovementCalculator(map_).get_movement_points_with_path(start, max_mv),
+                             _baseline_movement_points_with_path(map_, start, max_mv))
+
+    def test_get_movement_paths_path_to_unreachable_point_raises_error(self):
+        map_ = Map(3, 3, [Tile() for _ in range(9)])
+        answer = MovementCalculator(map_).get_movement_paths(Point(0, 0), 1)
+        self.assertNotIn(Point(2, 2), answer)
+        self.assertIsNone(answer.get_mv_pts(Point(2, 2)))
+        self.assertRaises(ValueError, answer.path_to, Point(2, 2))
+
+    def test_get_movement_paths_get_movement_points_matches_get_movement_points(self):
+        points_to_elevation = {Point(0, 0): 0, Point(1, 0): 1, Point(2, 0): 2,
+                               Point(0, 1): 1, Point(1, 1): 2, Point(2, 1): 3,
+                               Point(0, 2): 2, Point(1, 2): 3, Point(2, 2): 4}
+        tiles = [Tile(elevation=elevation, point=point) for point, elevation in points_to_elevation.items()]
+        map_ = Map(3, 3, tiles)
+        calculator = MovementCalculator(map_)
+        self.assertEqual(calculator.get_movement_paths(Point(1, 1), 3).get_movement_points(),
+                         calculator.get_movement_points(Point(1, 1), 3))
+
+    def test_get_movement_paths_to_dict(self):
+        map_ = Map(2, 2, [Tile() for _ in range(4)])
+        answer = MovementCalculator(map_).get_movement_paths(Point(0, 0), 100)
+        expected = {Point(0, 0): (0, []),
+                    Point(0, 1): (1, [N]),
+                    Point(1, 0): (1, [E]),
+                    Point(1, 1): (2, [E, N])}
+        self.assertEqual(answer.to_dict(), expected)
+
+    def test_get_team_movement_paths_matches_single_calls(self):
+        map_ = Map(5, 5, [Tile(elevation=index % 3) for index in range(25)])
+        team = Team(Point(2, 2), map_)
+        units = [Soldier(action_pts=pts) for pts in (1, 3, 5)]
+        for unit in units:
+            team.add_player(unit)
+            team.spawn()
+        calculator = MovementCalculator(map_)
+        answer = calculator.get_team_movement_paths(team)
+        self.assertEqual(list(answer), units)
+        for unit in units:
+            expected = calculator.get_movement_points_with_path(map_.get_point(unit), unit.get_action_points())
+            self.assertEqual(answer[unit].to_dict(), expected)
+
+    def test_get_team_movement_paths_with_processes(self):
+        map_ = Map(5, 5, [Tile(elevation=index % 3) for index in range(25)])
+        team = Team(Point(2, 2), map_)
+        units = [Soldier(action_pts=pts) for pts in (1, 3, 5)]
+        for unit in units:
+            team.add_player(unit)
+            team.spawn()
+        calculator = MovementCalculator(map_)
+        single = calculator.get_team_movement_paths(team)
+        pooled = calculator.get_team_movement_paths(team, processes=2)
+        self.assertEqual(list(pooled), units)
+        for unit in units:
+            self.assertEqual(pooled[unit].to_dict(), single[unit].to_dict())
+
+    def test_get_team_movement_paths_empty_team(self):
+        map_ = Map(2, 2, [Tile() for _ in range(4)])
+        self.assertEqual(MovementCalculator(map_).get_team_movement_paths(Team(Point(0, 0), map_)), {})
+
+    def test_terrain_costs_are_recalculated_after_tile_changes(self):
+        map_ = Map(2, 1, [Tile() for _ in range(2)])
+        calculator = MovementCalculator(map_)
+        self.assertEqual(calculator.get_movement_points(Point(0, 0), 5), {Point(0, 0): 0, Point(1, 0): 1})
+        map_.set_tile(Tile(point=Point(1, 0), elevation=2))
+        self.assertEqual(calculator.get_movement_points(Point(0, 0), 5), {Point(0, 0): 0, Point(1, 0): 3})
+
+    def test_get_distance_field_matches_forward_search(self):
+        points_to_elevation = {Point(0, 0): 0, Point(1, 0): 3, Point(2, 0): 2,
+                               Point(0, 1): 1, Point(1, 1): 2, Point(2, 1): 0,
+                               Point(0, 2): 2, Point(1, 2): 3, Point(2, 2): 4}
+        tiles = [Tile(elevation=elevation, point=point) for point, elevation in points_to_elevation.items()]
+        map_ = Map(3, 3, tiles)
+        calculator = MovementCalculator(map_)
+        goal = Point(1, 1)
+        field = calculator.get_distance_field(goal)
+        self.assertIsInstance(field, DistanceField)
+        self.assertEqual(field.goal, goal)
+        for point in points_to_elevation:
+            self.assertEqual(field.get_distance(point), calculator.get_movement_points(point, 100)[goal])
+
+    def test_get_distance_field_get_path_leads_to_goal_at_distance_cost(self):
+        points_to_elevation = {Point(0, 0): 0, Point(1, 0): 3, Point(2, 0): 2,
+                               Point(0, 1): 1, Point(1, 1): 2, Point(2, 1): 0,
+                               Point(0, 2): 2, Point(1, 2): 3, Point(2, 2): 4}
+        tiles = [Tile(elevation=elevation, point=point) for point, elevation in points_to_elevation.items()]
+        map_ = Map(3, 3, tiles)
+        goal = Point(2, 2)
+        field = MovementCalculator(map_).get_distance_field(goal)
+        for point in points_to_elevation:
+            path = field.get_path(point)
+            visited = [point] + list(point.generate_path(path))
+            self.assertEqual(visited[-1], goal)
+            cost = sum(map_.get_tile(start).move_pts(map_.get_tile(finish))
+                       for start, finish in zip(visited, visited[1:]))
+            self.assertEqual(cost, field.get_distance(point))
+        self.assertIsNone(field.get_next_step(goal))
+        self.assertEqual(field.get_path(goal), [])
+
+    def test_get_distance_field_ignores_units_and_honours_impassable(self):
+        tiles = [Tile(), ImpassableTile(), Tile(),
+                 Tile(), ImpassableTile(), Tile(),
+                 Tile(), Tile(), Tile()]
+        map_ = Map(3, 3, tiles)
+        map_.place_unit(Soldier(), Point(1, 2))
+        field = MovementCalculator(map_).get_distance_field(Point(0, 0))
+        self.assertEqual(field.get_distance(Point(2, 0)), 6)
+        self.assertEqual(field.get_path(Point(2, 0)), [N, N, W, W, S, S])
+        self.assertEqual(field.get_distance(Point(1, 0)), 1)
+        self.assertEqual(field.get_distance(Point(5, 5)), float('inf'))
+        self.assertIsNone(field.get_next_step(Point(5, 5)))
+
+    def test_get_distance_field_max_mv(self):
+        map_ = Map(4, 1, [Tile() for _ in range(4)])
+        field = MovementCalculator(map_).get_distance_field(Point(0, 0), max_mv=2)
+        self.assertEqual(field.get_distance(Point(2, 0)), 2)
+        self.assertEqual(field.get_distance(Point(3, 0)), float('inf'))
+        self.assertEqual(field.get_path(Point(3, 0)), [])
+
+    def test_get_distance_field_is_cached_until_terrain_changes(self):
+        map_ = Map(3, 1, [Tile() for _ in range(3)])
+        calculator = MovementCalculator(map_)
+        field = calculator.get_distance_field(Point(0, 0))
+        self.assertIs(calculator.get_distance_field(Point(0, 0)), field)
+        self.assertIsNot(calculator.get_distance_field(Point(1, 0)), field)
+
+        map_.set_tile(Tile(point=Point(0, 0), elevation=3))
+        new_field = calculator.get_distance_field(Point(0, 0))
+        self.assertIsNot(new_field, field)
+        self.assertEqual(new_field.get_distance(Point(2, 0)), 5)
+
+        calculator.clear_distance_fields()
+        self.assertIsNot(calculator.get_distance_field(Point(0, 0)), new_field)
+
+    def test_get_distance_field_keeps_only_recently_used_fields(self):
+        map_ = Map(5, 5, [Tile() for _ in range(25)])
+        calculator = MovementCalculator(map_, distance_fields_kept=2)
+        first = calculator.get_distance_field(Point(0, 0))
+        calculator.get_distance_field(Point(1, 0))
+        self.assertIs(calculator.get_distance_field(Point(0, 0)), first)
+        calculator.get_distance_field(Point(2, 0))
+        self.assertIs(calculator.get_distance_field(Point(0, 0)), first)
+        self.assertEqual(len(calculator._distance_fields), 2)
+        for goal in Point(0, 0).to_rectangle(5, 5):
+            calculator.get_distance_field(goal)
+            self.assertLessEqual(len(calculator._distance_fields), 2)
+        self.assertIsNot(calculator.get_distance_field(Point(0, 0)), first)
+
+    def test_find_path_same_cost_as_get_movement_paths(self):
+        elevations = {Point(0, 0): 0, Point(1, 0): 11, Point(2, 0): 0,  Point(3, 0): 0,
+                      Point(0, 1): 0, Point(1, 1): 11, Point(2, 1): 11, Point(3, 1): 0,
+                      Point(0, 2): 0, Point(1, 2): 11, Point(2, 2): 11, Point(3, 2): 0,
+                      Point(0, 3): 0, Point(1, 3): 0,  Point(2, 3): 0,  Point(3, 3): 0}
+        tiles = [Tile(point=point, elevation=elevation * 2) for point, elevation in elevations.items()]
+        map_ = Map(4, 4, tiles)
+        calculator = MovementCalculator(map_)
+        path = calculator.find_path(Point(0, 0), Point(2, 0))
+        self.assertEqual(path, [N, N, N, E, E, E, S, S, S, W])
+
+    def test_find_path_start_is_finish(self):
+        map_ = Map(2, 2, [Tile() for _ in range(4)])
+        map_.place_unit(Soldier(), Point(0, 0))
+        self.assertEqual(MovementCalculator(map_).find_path(Point(0, 0), Point(0, 0)), [])
+
+    def test_find_path_avoids_units(self):
+        map_ = Map(3, 2, [Tile() for _ in range(6)])
+        map_.place_unit(Soldier(), Point(1, 0))
+        self.assertEqual(MovementCalculator(map_).find_path(Point(0, 0), Point(2, 0)), [N, E, E, S])
+
+    def test_find_path_none(self):
+        tiles = [Tile(), ImpassableTile(), Tile()]
+        map_ = Map(3, 1, tiles)
+        calculator = MovementCalculator(map_)
+        self.assertIsNone(calculator.find_path(Point(0, 0), Point(2, 0)))
+        self.assertIsNone(calculator.find_path(Point(0, 0), Point(5, 0)))
+
+    def test_find_path_finish_occupied_is_none(self):
+        map_ = Map(3, 1, [Tile() for _ in range(3)])
+        map_.place_unit(Soldier(), Point(2, 0))
+        self.assertIsNone(MovementCalculator(map_).find_path(Point(0, 0), Point(2, 0)))
+
+    def test_find_path_max_mv(self):
+        map_ = Map(4, 1, [Tile(terrain_mv=2) for _ in range(4)])
+        calculator = MovementCalculator(map_)
+        self.assertEqual(calculator.find_path(Point(0, 0), Point(3, 0), max_mv=6), [E, E, E])
+        self.assertIsNone(calculator.find_path(Point(0, 0), Point(3, 0), max_mv=5))
+
+
+def _baseline_movement_points_with_path(map_: Map, start: Point, max_mv: int):
+    """the search MovementCalculator used to do: relax (mv_pts, path) pairs until nothing changes."""
+    def get_mv_pts(point, other):
+        if map_.can_place_unit(other):
+            return map_.get_tile(point).move_pts(map_.get_tile(other))
+        return float('inf')
+
+    max_value = (max_mv, [N] * map_.get_size()[1])
+    values = {start: (0, [])}
+    edges = {start}
+    while any(values[edge] <= max_value for edge in edges):
+        new_edges = set()
+        for edge in edges:
+            mv_pts, path = values[edge]
+            if values[edge] >= max_value:
+                continue
+            for direction in Direction:
+                candidate = edge.in_direction(direction)
+                value = (mv_pts + get_mv_pts(edge, candidate), path + [direction])
+                if candidate not in values or value < values[candidate]:
+                    new_edges.add(candidate)
+                    values[candidate] = value
+        edges = new_edges
+    return {point: value for point, value in values.items() if value <= max_value}
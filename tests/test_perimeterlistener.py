@@ -1,3 +1,4 @@
+import copy
 from unittest import TestCase
 
 from battle.maptools.map import Map
@@ -18,6 +19,20 @@ class TestPerimeterListener(TestCase):
         self.ranged = Soldier()
         self.ranged.equip_weapon(self.gun)
 
+    def test_copy_is_told_about_changes_to_its_map(self):
+        map_ = Map(5, 1, [Tile() for _ in range(5)])
+        map_.place_unit(self.ranged, Point(0, 0))
+        listener = PerimeterListener(map_)
+        listener.set_perimeter(self.ranged, Point(0, 0))
+        listener_copy = copy.deepcopy(listener)
+        copied_map = listener_copy._map
+        copied_unit = copied_map.get_unit(Point(0, 0))
+        copied_map.set_tile(Tile(point=Point(1, 0), elevation=10))
+        fresh = PerimeterListener(copied_map)
+        fresh.set_perimeter(copied_unit, Point(0, 0))
+        self.assertEqual(listener_copy.get_watched_points(copied_unit), fresh.get_watched_points(copied_unit))
+        self.assertNotEqual(listener_copy.get_watched_points(copied_unit), listener.get_watched_points(self.ranged))
+
     def test_set_up(self):
         self.assertEqual(self.gun.range, 2)
         self.assertIsInstance(self.gun, RangedWeapon)
@@ -181,3 +196,78 @@ class TestPerimeterListener(TestCase):
         listener.rm_perimeter(self.ranged)
 
         self.assertEqual(listener._watchers_at_point, no_ranged)
+
+    def test_rm_perimeter_unit_without_perimeter_does_nothing(self):
+        the_map = Map(2, 2, [Tile() for _ in range(4)])
+        listener = PerimeterListener(the_map)
+        listener.rm_perimeter(self.melee)
+        self.assertEqual(listener._watchers_at_point, {pt: set() for pt in Point(0, 0).to_rectangle(2, 2)})
+
+    def test_get_watched_points(self):
+        the_map = Map(3, 3, [Tile() for _ in range(9)])
+        listener = PerimeterListener(the_map)
+        self.assertEqual(listener.get_watched_points(self.melee), set())
+        listener.set_perimeter(self.melee, Point(0, 0))
+        self.assertEqual(listener.get_watched_points(self.melee), {Point(1, 0), Point(0, 1)})
+        listener.rm_perimeter(self.melee)
+        self.assertEqual(listener.get_watched_points(self.melee), set())
+
+    def test_move_perimeter(self):
+        the_map = Map(3, 3, [Tile() for _ in range(9)])
+        listener = PerimeterListener(the_map)
+        listener.set_perimeter(self.melee, Point(0, 0))
+        listener.set_perimeter(self.ranged, Point(2, 2))
+        listener.move_perimeter(self.melee, Point(1, 1))
+
+        expected = PerimeterListener(the_map)
+        expected.set_perimeter(self.melee, Point(1, 1))
+        expected.set_perimeter(self.ranged, Point(2, 2))
+        self.assertEqual(listener._watchers_at_point, expected._watchers_at_point)
+        self.assertEqual(listener.get_watched_points(self.melee),
+                         {Point(1, 0), Point(0, 1), Point(2, 1), Point(1, 2)})
+
+    def test_move_perimeter_without_perimeter_sets_perimeter(self):
+        the_map = Map(3, 3, [Tile() for _ in range(9)])
+        listener = PerimeterListener(the_map)
+        listener.move_perimeter(self.melee, Point(0, 0))
+        self.assertEqual(listener.get_attackers(Point(1, 0)), {self.melee})
+        self.assertEqual(listener.get_attackers(Point(0, 1)), {self.melee})
+
+    def test_perimeter_updated_when_tile_changes(self):
+        the_map = Map(3, 3, [Tile() for _ in range(9)])
+        listener = PerimeterListener(the_map)
+        listener.set_perimeter(self.ranged, Point(0, 0))
+        self.assertIn(self.ranged, listener.get_attackers(Point(2, 0)))
+
+        the_map.set_tile(Tile(elevation=5, point=Point(1, 0)))
+        self.assertNotIn(self.ranged, listener.get_attackers(Point(2, 0)))
+
+        expected = PerimeterListener(the_map)
+        expected.set_perimeter(self.ranged, Point(0, 0))
+        self.assertEqual(listener._watchers_at_point, expected._watchers_at_point)
+
+    def test_perimeter_from_every_origin_updated_when_tile_changes(self):
+        the_map = Map(5, 1, [Tile() for _ in range(5)])
+        listener = PerimeterListener(the_map)
+        listener.set_perimeter(self.melee, Point(0, 0))
+        listener.set_perimeter(self.melee, Point(4, 0))
+        self.assertEqual(listener.get_watched_points(self.melee), {Point(1, 0), Point(3, 0)})
+
+        the_map.set_tile(Tile(elevation=10, point=Point(1, 0)))
+        self.assertEqual(listener.get_watched_points(self.melee), {Point(3, 0)})
+        the_map.set_tile(Tile(elevation=0, point=Point(1, 0)))
+        the_map.set_tile(Tile(elevation=10, point=Point(3, 0)))
+        self.assertEqual(listener.get_watched_points(self.melee), {Point(1, 0)})
+
+        expected = PerimeterListener(the_map)
+        expected.set_perimeter(self.melee, Point(0, 0))
+        expected.set_perimeter(self.melee, Point(4, 0))
+        self.assertEqual(listener._watchers_at_point, expected._watchers_at_point)
+
+    def test_removed_perimeter_not_restored_when_tile_changes(self):
+        the_map = Map(3, 3, [Tile() for _ in range(9)])
+        listener = PerimeterListener(the_map)
+        listener.set_perimeter(self.melee, Point(0, 0))
+        listener.rm_perimeter(self.melee)
+        the_map.set_tile(Tile(elevation=1, point=Point(1, 0)))
+        self.assertEqual(listener.get_watched_points(self.melee), set())
@@ -0,0 +1,27 @@
+import random
+import unittest
+
+from battle.players.action import Action
+from battle.players.strategy import Strategy, StupidStrategy
+from battle.maptools.vector import DangerOpportunity
+
+
+class TestStrategy(unittest.TestCase):
+    def test_get_action_not_implemented(self):
+        empty = DangerOpportunity.empty()
+        self.assertRaises(NotImplementedError, Strategy().get_action, empty, empty)
+
+    def test_stupid_strategy_returns_every_action(self):
+        empty = DangerOpportunity.empty()
+        actions = StupidStrategy().get_action(empty, empty)
+        self.assertEqual(sorted(actions, key=lambda action: action.name), Action.to_list())
+
+    def test_stupid_strategy_uses_rng(self):
+        empty = DangerOpportunity.empty()
+        strategy_1 = StupidStrategy(random.Random(2))
+        strategy_2 = StupidStrategy(random.Random(2))
+        for _ in range(3):
+            self.assertEqual(strategy_1.get_action(empty, empty), strategy_2.get_action(empty, empty))
+        expected = Action.to_list()
+        random.Random(2).shuffle(expected)
+        self.assertEqual(StupidStrategy(random.Random(2)).get_action(empty, empty), expected)
@@ -1,4 +1,7 @@
-from battle.players.team import Team
+import pickle
+import random
+
+from battle.players.team import Team, get_team_of
 from battle.players.units import Soldier
 from battle.maptools.map import Map, MapPlacementError
 from battle.maptools.tile import Tile
@@ -80,6 +83,47 @@ class TestTeam(unittest.TestCase):
         self.team.add_player(unit)
         self.assertFalse(self.team.is_on_team(Soldier()))
 
+    def test_get_team_of(self):
+        unit = Soldier()
+        self.assertIsNone(get_team_of(unit))
+        self.team.add_player(unit)
+        self.assertIs(get_team_of(unit), self.team)
+        self.team.spawn()
+        self.assertIs(get_team_of(unit), self.team)
+        self.team.unteam_player(unit)
+        self.assertIsNone(get_team_of(unit))
+
+    def test_get_team_of_base_is_none(self):
+        self.assertIsNone(get_team_of(self.team.base))
+
+    def test_add_player_on_another_team_raises_error(self):
+        unit = Soldier()
+        other_team = Team(Point(0, 0), self.map)
+        self.team.add_player(unit)
+        self.assertRaises(ValueError, other_team.add_player, unit)
+        self.assertFalse(other_team.is_on_team(unit))
+        self.assertIs(get_team_of(unit), self.team)
+        self.assertRaises(ValueError, other_team.unteam_player, unit)
+        self.assertIs(get_team_of(unit), self.team)
+        self.assertTrue(self.team.is_on_team(unit))
+
+    def test_add_player_after_leaving_another_team(self):
+        unit = Soldier()
+        other_team = Team(Point(0, 0), self.map)
+        self.team.add_player(unit)
+        self.team.unteam_player(unit)
+        other_team.add_player(unit)
+        self.assertIs(get_team_of(unit), other_team)
+
+    def test_get_team_of_after_pickle(self):
+        unit = Soldier()
+        self.team.add_player(unit)
+        team = pickle.loads(pickle.dumps(self.team))
+        new_unit = team.undeployed[0]
+        self.assertIs(get_team_of(new_unit), team)
+        self.assertTrue(team.is_on_team(new_unit))
+        self.assertIs(get_team_of(unit), self.team)
+
     def test_spawn(self):
         units = [Soldier(), Soldier(), Soldier()]
         for soldier in units:
@@ -158,9 +202,100 @@ class TestTeam(unittest.TestCase):
         self.team.add_player(unit)
         self.assertEqual(self.team.spawn(), (unit, Point(1, 0)))
 
+    def test_spawn_no_room_keeps_unit_undeployed(self):
+        units = [Soldier() for _ in range(9)]
+        for soldier in units:
+            self.team.add_player(soldier)
+        for _ in range(8):
+            self.team.spawn()
+        self.assertRaises(ValueError, self.team.spawn)
+        self.assertEqual(self.team.undeployed, units[8:])
+
+    def test_spawn_fills_point_freed_after_last_spawn(self):
+        units = [Soldier() for _ in range(3)]
+        for soldier in units:
+            self.team.add_player(soldier)
+        self.team.spawn()
+        self.team.spawn()
+        self.map.remove_unit(Point(1, 0))
+        self.assertEqual(self.team.spawn(), (units[2], Point(1, 0)))
+
+    def test_spawn_avoids_unit_placed_after_last_spawn(self):
+        units = [Soldier() for _ in range(2)]
+        for soldier in units:
+            self.team.add_player(soldier)
+        self.team.spawn()
+        self.map.place_unit(Soldier(), Point(0, 1))
+        self.assertEqual(self.team.spawn(), (units[1], Point(2, 1)))
+
+    def test_spawn_all(self):
+        units = [Soldier() for _ in range(3)]
+        for soldier in units:
+            self.team.add_player(soldier)
+        answer = self.team.spawn_all()
+        self.assertEqual(answer, [(units[0], Point(1, 0)), (units[1], Point(0, 1)), (units[2], Point(2, 1))])
+        self.assertEqual(self.team.deployed, units)
+        self.assertEqual(self.team.undeployed, [])
+        self.assertEqual(self.team.spawn_all(), [])
+
+    def test_spawn_and_spawn_all_same_as_searching_from_home_each_time(self):
+        size = 15
+        rng = random.Random(2)
+        obstacles = rng.sample(Point(0, 0).to_rectangle(size, size), 90)
+        home = Point(7, 7)
+        if home in obstacles:
+            obstacles.remove(home)
+        answers = []
+        for spawn_method in ('search_from_home', 'spawn', 'spawn_all'):
+            map_ = Map(size, size, [Tile() for _ in range(size * size)])
+            for point in obstacles:
+                map_.place_unit(Soldier(), point)
+            team = Team(home, map_)
+            units = [Soldier() for _ in range(100)]
+            for unit in units:
+                team.add_player(unit)
+            if spawn_method == 'search_from_home':
+                answer = [_search_from_home(map_, home, unit) for unit in units]
+            elif spawn_method == 'spawn':
+                answer = [team.spawn()[1] for _ in units]
+            else:
+                answer = [point for _, point in team.spawn_all()]
+            answers.append(answer)
+        self.assertEqual(answers[0], answers[1])
+        self.assertEqual(answers[0], answers[2])
+
+    def test_spawn_all_after_map_changes(self):
+        units = [Soldier() for _ in range(4)]
+        for soldier in units:
+            self.team.add_player(soldier)
+        self.team.spawn()
+        self.team.spawn()
+        self.map.remove_unit(Point(1, 0))
+        self.map.place_unit(Soldier(), Point(2, 1))
+        answer = self.team.spawn_all()
+        self.assertEqual(answer, [(units[2], Point(1, 0)), (units[3], Point(1, 2))])
+
+    def test_spawn_all_no_room_on_map(self):
+        units = [Soldier() for _ in range(10)]
+        for soldier in units:
+            self.team.add_player(soldier)
+        self.assertRaises(ValueError, self.team.spawn_all)
+        self.assertEqual(self.team.deployed, units[:8])
+        self.assertEqual(self.team.undeployed, units[8:])
+
     def test_place_unit_and_then_spawn_raises_error(self):
         unit = Soldier()
         self.team.add_player(unit)
         self.map.place_unit(unit, Point(1, 0))
 
         self.assertRaises(MapPlacementError, self.team.spawn)
+
+
+def _search_from_home(map_: Map, home: Point, unit: Soldier) -> Point:
+    """how spawn used to work: look at each ring around home from distance 1 every time."""
+    for distance in range(1, sum(map_.get_size()) + 1):
+        for candidate in home.at_distance(distance):
+            if map_.can_place_unit(candidate):
+                map_.place_unit(unit, candidate)
+                return candidate
+    raise ValueError('No space for you!')
@@ -1,5 +1,6 @@
 import unittest
 
+from battle.players.strategy import StupidStrategy
 from battle.players.units import Soldier, FIST, GUN, Base
 from battle.weapon import MeleeWeapon
 
@@ -21,6 +22,12 @@ class TestSoldier(unittest.TestCase):
         self.assertEqual(unit.get_action_points(), 5)
         self.assertEqual(unit._healing_pct, 10.0)
 
+    def test_init_strategy(self):
+        self.assertIsInstance(self.soldier.strategy, StupidStrategy)
+        self.assertIsNot(self.soldier.strategy, Soldier().strategy)
+        strategy = StupidStrategy()
+        self.assertIs(Soldier(strategy=strategy).strategy, strategy)
+
     def test_get_perimeter_size(self):
         unit = Soldier()
         self.assertEqual(unit.get_perimeter_size(), 1)
@@ -1,3 +1,5 @@
+import copy
+import pickle
 import unittest
 
 from battle.maptools.map import Map
@@ -13,6 +15,16 @@ class TestRangeFinder(unittest.TestCase):
         self.ranger = RangeFinder(map_=self.test_map)
         self.soldier = Soldier()
 
+    def test_copy_is_told_about_changes_to_its_map(self):
+        map_ = Map(5, 1, [Tile() for _ in range(5)])
+        range_finder = RangeFinder(map_)
+        range_finder.get_sight_ranges(Point(0, 0), 4)
+        for range_finder_copy in (copy.deepcopy(range_finder), pickle.loads(pickle.dumps(range_finder))):
+            range_finder_copy._map.set_tile(Tile(point=Point(1, 0), elevation=10))
+            fresh = RangeFinder(range_finder_copy._map)
+            self.assertEqual(range_finder_copy.get_sight_ranges(Point(0, 0), 4), fresh.get_sight_ranges(Point(0, 0), 4))
+        self.assertEqual(range_finder.get_sight_ranges(Point(0, 0), 4)[4], [Point(4, 0)])
+
     def test_init(self):
         map_ = Map(2, 2, [Tile(), Tile(), Tile(), Tile()])
         range_finder = RangeFinder(map_)
@@ -136,6 +148,44 @@ class TestRangeFinder(unittest.TestCase):
 
         self.assertEqual(answer, expected)
 
+    def test_get_sight_ranges_is_shared_until_it_goes_stale(self):
+        answer = self.ranger.get_sight_ranges(Point(0, 0), 1)
+        self.assertIs(self.ranger.get_sight_ranges(Point(0, 0), 1), answer)
+        self.test_map.set_tile(Tile(elevation=5, point=Point(1, 0)))
+        self.assertIsNot(self.ranger.get_sight_ranges(Point(0, 0), 1), answer)
+
+    def test_get_sight_ranges_keeps_only_recently_used_ranges(self):
+        ranger = RangeFinder(self.test_map, sight_ranges_kept=2)
+        first = ranger.get_sight_ranges(Point(0, 0), 1)
+        ranger.get_sight_ranges(Point(1, 0), 1)
+        self.assertIs(ranger.get_sight_ranges(Point(0, 0), 1), first)
+        ranger.get_sight_ranges(Point(2, 0), 1)
+        self.assertIs(ranger.get_sight_ranges(Point(0, 0), 1), first)
+        self.assertEqual(len(ranger._sight_ranges), 2)
+        for origin in Point(0, 0).to_rectangle(3, 3):
+            ranger.get_sight_ranges(origin, 1)
+            self.assertLessEqual(len(ranger._sight_ranges), 2)
+        self.assertIsNot(ranger.get_sight_ranges(Point(0, 0), 1), first)
+        self.assertEqual(ranger.get_sight_ranges(Point(0, 0), 1), first)
+
+    def test_get_sight_ranges_updated_when_tile_changes(self):
+        origin = Point(0, 0)
+        self.assertEqual(self.ranger.get_sight_ranges(origin, 2)[2], [Point(2, 0), Point(1, 1), Point(0, 2)])
+        self.test_map.set_tile(Tile(elevation=5, point=Point(1, 0)))
+        self.assertEqual(self.ranger.get_sight_ranges(origin, 2)[2], [Point(1, 1), Point(0, 2)])
+
+    def test_get_sight_ranges_kept_when_far_tile_changes(self):
+        origin = Point(0, 0)
+        before = self.ranger.get_sight_ranges(origin, 1)
+        self.test_map.set_tile(Tile(elevation=5, point=Point(2, 2)))
+        self.assertIn((origin, 1), self.ranger._sight_ranges)
+        self.assertEqual(self.ranger.get_sight_ranges(origin, 1), before)
+
+    def test_clear_sight_ranges(self):
+        self.ranger.get_sight_ranges(Point(0, 0), 1)
+        self.ranger.clear_sight_ranges()
+        self.assertEqual(self.ranger._sight_ranges, {})
+
     def test_get_sight_ranges_distance_zero(self):
         origin = Point(0, 1)
         answer = self.ranger.get_sight_ranges(origin, 0)
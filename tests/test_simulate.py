@@ -0,0 +1,86 @@
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from battle.maptools.generator import generate_map
+from battle.maptools.mapfile import save_map
+from battle.maptools.point import Point
+from battle.simulate import BattleConfig, build_map, build_team, run_battle, run_battles, main
+from battle.weapon import RangedWeapon
+
+
+class TestSimulate(unittest.TestCase):
+    def setUp(self):
+        self.config = BattleConfig(width=8, height=8, units_per_team=3, ranged_per_team=1, max_turns=20)
+
+    def test_config_raises_error(self):
+        self.assertRaises(ValueError, BattleConfig, width=1)
+        self.assertRaises(ValueError, BattleConfig, units_per_team=2, ranged_per_team=3)
+
+    def test_config_to_dict_and_from_dict(self):
+        config = BattleConfig.from_dict(self.config.to_dict())
+        self.assertEqual(config.to_dict(), self.config.to_dict())
+
+    def test_build_map_is_seeded_and_keeps_homes_passable(self):
+        config = BattleConfig(width=5, height=5, impassable_pct=100)
+        map_ = build_map(config, random.Random(1))
+        for home in config.get_homes():
+            self.assertFalse(map_.is_impassable(home))
+        self.assertTrue(map_.is_impassable(Point(2, 2)))
+
+        map_1 = build_map(self.config, random.Random(3))
+        map_2 = build_map(self.config, random.Random(3))
+        for point in Point(0, 0).to_rectangle(8, 8):
+            self.assertEqual(map_1.get_elevation(point), map_2.get_elevation(point))
+
+    def test_build_team(self):
+        map_ = build_map(self.config, random.Random(0))
+        team = build_team(self.config, Point(0, 0), map_, random.Random(0))
+        units = team.undeployed
+        self.assertEqual(len(units), 3)
+        self.assertIsInstance(units[0].get_weapon(), RangedWeapon)
+        self.assertTrue(units[1].get_weapon().is_melee_weapon())
+        self.assertIsNot(units[0].get_weapon(), build_team(self.config, Point(7, 7), map_, random.Random(0)).undeployed[0].get_weapon())
+
+    def test_run_battle_is_repeatable(self):
+        result = run_battle(self.config, 5)
+        self.assertEqual(result, run_battle(self.config, 5))
+        self.assertEqual(result['seed'], 5)
+        self.assertIn(result['winner'], (0, 1, 2))
+        self.assertLessEqual(result['turns'], 20)
+
+    def test_run_battle_does_not_use_global_random(self):
+        random.seed(1)
+        first = run_battle(self.config, 5)
+        random.seed(2)
+        self.assertEqual(run_battle(self.config, 5), first)
+
+    def test_run_battles_with_processes_matches_run_battles(self):
+        serial = run_battles(self.config, 4, seed=10)
+        self.assertEqual([result['seed'] for result in serial], [10, 11, 12, 13])
+        self.assertEqual(run_battles(self.config, 4, seed=10, processes=2), serial)
+
+    def test_run_battles_on_map_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'map.bmap')
+            save_map(generate_map(10, 6, seed=1), path)
+            config = BattleConfig(units_per_team=2, ranged_per_team=1, max_turns=10, map_file=path)
+            serial = run_battles(config, 3)
+            self.assertEqual(serial, run_battles(config, 3))
+            self.assertEqual(run_battles(config, 3, processes=2), serial)
+            self.assertTrue(all(result['turns'] <= 10 for result in serial))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_main(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            main(['--battles', '2', '--seed', '3'])
+        lines = out.getvalue().splitlines()
+        self.assertEqual([json.loads(line)['seed'] for line in lines], [3, 4])
@@ -34,6 +34,15 @@ class TestTargetFinder(unittest.TestCase):
             test_team = test.get_team(unit)
             self.assertTrue(test_team.is_on_team(unit))
 
+    def test_get_team_not_on_a_team(self):
+        test = TargetFinder(self.map, [self.team_a, self.team_b])
+        self.assertIsNone(test.get_team(Soldier()))
+        self.assertIsNone(test.get_team(self.team_a.base))
+
+    def test_get_team_only_from_its_teams(self):
+        test = TargetFinder(self.map, [self.team_a])
+        self.assertIsNone(test.get_team(self.b_units[0]))
+
     def test_init_copies_team_list(self):
         teams = [self.team_a, self.team_b]
         test = TargetFinder(self.map, teams)
@@ -0,0 +1,183 @@
+import random
+import unittest
+
+from battle.maptools.map import Map
+from battle.maptools.point import Point
+from battle.maptools.tile import Tile
+from battle.players.action import Action
+from battle.players.strategy import Strategy
+from battle.players.team import Team
+from battle.perimiterlistener import PerimeterListener
+from battle.players.units import Soldier
+from battle.turn_execution.turn_coordinator import Actionator, TurnCoordinator
+from battle.weapon import MeleeWeapon, RangedWeapon
+
+
+class FixedStrategy(Strategy):
+    def __init__(self, actions):
+        super(FixedStrategy, self).__init__()
+        self._actions = actions
+
+    def get_action(self, ally, enemy):
+        return self._actions[:]
+
+
+class TestActionator(unittest.TestCase):
+    def setUp(self):
+        self.map = Map(7, 1, [Tile() for _ in range(7)])
+        self.team_1 = Team(Point(0, 0), self.map)
+        self.team_2 = Team(Point(6, 0), self.map)
+        self.unit_1 = Soldier()
+        self.unit_2 = Soldier()
+        self.team_1.add_player(self.unit_1)
+        self.team_2.add_player(self.unit_2)
+        self.listener = PerimeterListener(self.map)
+        self.actionator = Actionator(self.map, self.listener, [self.team_1, self.team_2])
+
+    def deploy_all(self):
+        for team in (self.team_1, self.team_2):
+            for unit, point in team.spawn_all():
+                self.listener.set_perimeter(unit, point)
+
+    def test_get_ally_enemy(self):
+        self.assertEqual(self.actionator.get_ally_enemy(self.unit_1), (self.team_1, self.team_2))
+        self.assertEqual(self.actionator.get_ally_enemy(self.unit_2), (self.team_2, self.team_1))
+
+    def test_move_moves_toward_enemy_and_spends_action_points(self):
+        self.deploy_all()
+        self.assertEqual(self.actionator.move(self.unit_1), Point(4, 0))
+        self.assertEqual(self.map.get_point(self.unit_1), Point(4, 0))
+        self.assertIsNone(self.map.get_unit(Point(1, 0)))
+        self.assertEqual(self.unit_1.get_action_points(), 0)
+        self.assertEqual(self.listener.get_watched_points(self.unit_1), {Point(3, 0), Point(5, 0)})
+
+    def test_move_stops_on_point_watched_by_enemy(self):
+        self.unit_2.equip_weapon(RangedWeapon(dmg=1, action_pts=1, range_=3, ammo=10))
+        self.deploy_all()
+        self.assertEqual(self.actionator.move(self.unit_1), Point(2, 0))
+        self.assertEqual(self.unit_1.get_action_points(), 2)
+
+    def test_move_without_enemies_stays(self):
+        self.team_2.unteam_player(self.unit_2)
+        self.deploy_all()
+        self.assertEqual(self.actionator.move(self.unit_1), Point(1, 0))
+        self.assertEqual(self.unit_1.get_action_points(), 3)
+
+    def test_get_enemies_in_range_ignores_bases_and_allies(self):
+        ally = Soldier()
+        self.team_2.add_player(ally)
+        self.deploy_all()
+        self.assertEqual(self.map.get_point(ally), Point(4, 0))
+        self.map.remove_unit(Point(1, 0))
+        self.map.place_unit(self.unit_1, Point(3, 0))
+        self.assertEqual(self.actionator.get_enemies_in_range(ally), {self.unit_1: (1, 0)})
+        self.assertEqual(self.actionator.get_enemies_in_range(self.unit_2), {})
+
+    def test_attack_until_out_of_action_points(self):
+        self.unit_1.equip_weapon(MeleeWeapon(dmg=10, action_pts=1))
+        self.deploy_all()
+        self.actionator.move(self.unit_2)
+        self.unit_1.reset_move_points()
+        self.assertEqual(self.actionator.attack(self.unit_1), [self.unit_2] * 3)
+        self.assertEqual(self.unit_2.get_health(), 70)
+        self.assertEqual(self.unit_1.get_action_points(), 0)
+
+    def test_attack_removes_dead(self):
+        self.unit_1.equip_weapon(MeleeWeapon(dmg=100, action_pts=1))
+        self.deploy_all()
+        self.actionator.move(self.unit_2)
+        point = self.map.get_point(self.unit_2)
+        self.assertEqual(self.actionator.attack(self.unit_1), [self.unit_2])
+        self.assertIsNone(self.map.get_unit(point))
+        self.assertFalse(self.team_2.is_on_team(self.unit_2))
+        self.assertEqual(self.listener.get_watched_points(self.unit_2), set())
+        self.assertEqual(self.unit_1.get_action_points(), 2)
+
+    def test_attack_nothing_in_range(self):
+        self.deploy_all()
+        self.assertEqual(self.actionator.attack(self.unit_1), [])
+
+    def test_take_turn_follows_actions_until_stay(self):
+        self.deploy_all()
+        self.actionator.take_turn(self.unit_1, [Action.NULL, Action.ATTACK, Action.STAY, Action.GO])
+        self.assertEqual(self.map.get_point(self.unit_1), Point(1, 0))
+        self.actionator.take_turn(self.unit_1, [Action.GO, Action.ATTACK, Action.STAY])
+        self.assertEqual(self.map.get_point(self.unit_1), Point(4, 0))
+
+
+class TestTurnCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.map = Map(7, 1, [Tile() for _ in range(7)])
+        self.team_1 = Team(Point(0, 0), self.map)
+        self.team_2 = Team(Point(6, 0), self.map)
+        self.unit_1 = Soldier()
+        self.unit_2 = Soldier()
+        self.team_1.add_player(self.unit_1)
+        self.team_2.add_player(self.unit_2)
+        self.coordinator = TurnCoordinator(self.map, self.team_1, self.team_2)
+
+    def test_create_turn_order_uses_rng(self):
+        units = [Soldier() for _ in range(3)]
+        for unit in units:
+            self.team_1.add_player(unit)
+        self.coordinator.deploy_all()
+        orders = []
+        for _ in range(2):
+            coordinator = TurnCoordinator(self.map, self.team_1, self.team_2, random.Random(4))
+            coordinator.create_turn_order()
+            orders.append(coordinator._unmoved_units)
+        self.assertEqual(orders[0], orders[1])
+        expected = self.team_1.deployed + self.team_2.deployed
+        random.Random(4).shuffle(expected)
+        self.assertEqual(orders[0], expected)
+
+    def test_deploy_all(self):
+        self.coordinator.deploy_all()
+        self.assertEqual(self.map.get_point(self.unit_1), Point(1, 0))
+        self.assertEqual(self.map.get_point(self.unit_2), Point(5, 0))
+        self.assertEqual(self.team_1.undeployed, [])
+        self.assertEqual(self.coordinator._pm.get_watched_points(self.unit_1), {Point(0, 0), Point(2, 0)})
+
+    def test_is_over_and_get_winner(self):
+        self.assertTrue(self.coordinator.is_over())
+        self.assertIsNone(self.coordinator.get_winner())
+        self.coordinator.deploy_all()
+        self.assertFalse(self.coordinator.is_over())
+        self.assertIsNone(self.coordinator.get_winner())
+        self.team_2.unteam_player(self.unit_2)
+        self.assertTrue(self.coordinator.is_over())
+        self.assertIs(self.coordinator.get_winner(), self.team_1)
+
+    def test_take_turn_follows_strategy_until_stay(self):
+        self.unit_1._strategy = FixedStrategy([Action.NULL, Action.ATTACK, Action.STAY, Action.GO])
+        self.coordinator.deploy_all()
+        self.coordinator.take_turn(self.unit_1)
+        self.assertEqual(self.map.get_point(self.unit_1), Point(1, 0))
+
+        self.unit_1._strategy = FixedStrategy([Action.GO, Action.ATTACK, Action.STAY])
+        self.coordinator.take_turn(self.unit_1)
+        self.assertEqual(self.map.get_point(self.unit_1), Point(4, 0))
+
+    def test_play_turn_rests_units(self):
+        self.unit_1._strategy = FixedStrategy([Action.STAY])
+        self.unit_2._strategy = FixedStrategy([Action.STAY])
+        self.coordinator.deploy_all()
+        self.unit_1.receive_dmg(10)
+        self.coordinator.play_turn()
+        self.assertEqual(self.coordinator.get_turns(), 1)
+        self.assertEqual(self.unit_1.get_action_points(), 3)
+        self.assertEqual(self.unit_2.get_action_points(), 3)
+        self.assertGreaterEqual(self.unit_1.get_health(), 95)
+
+    def test_play_battle(self):
+        self.unit_1.equip_weapon(MeleeWeapon(dmg=100, action_pts=1))
+        self.unit_1._strategy = FixedStrategy([Action.GO, Action.ATTACK])
+        self.unit_2._strategy = FixedStrategy([Action.STAY])
+        self.assertIs(self.coordinator.play_battle(10), self.team_1)
+        self.assertEqual(self.coordinator.get_turns(), 2)
+
+    def test_play_battle_stops_at_max_turns(self):
+        self.unit_1._strategy = FixedStrategy([Action.STAY])
+        self.unit_2._strategy = FixedStrategy([Action.STAY])
+        self.assertIsNone(self.coordinator.play_battle(3))
+        self.assertEqual(self.coordinator.get_turns(), 3)